@@ -1,51 +1,79 @@
-import requests
 import time
 import json
 from datetime import datetime, timedelta
-import matplotlib.pyplot as plt
 import logging
-from logging.handlers import TimedRotatingFileHandler
 import os
 import re
-import yfinance as yf
-import subprocess
 import sys
+from concurrent.futures import ThreadPoolExecutor
 sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
 from utils.mcp_client import MCPClient
-from utils.trade_log_utils import load_trade_log, save_trade_log
+from utils.trade_log_utils import load_trade_log, save_trade_log, TRADE_LOG_JSON
+from utils.portfolio_analytics import (load_analytics, save_analytics, append_value_point, load_intraday_values,
+                                       ANALYTICS_STATE_JSON, PORTFOLIO_VALUES_JSONL, VALUATION_STORE_DIR)
+from utils.price_store import PriceStore
+from utils.quote_cache import get_quote_cache
+from utils.circuit_breaker import CircuitBreaker, CircuitOpenError, StaleCache
+from utils.llm_ensemble import EnsembleQuery, LLM_ENSEMBLE_MODELS
+from utils.log_config import configure_logging
+from utils.execution_engine import ExecutionEngine, HTTPBroker, plan_orders, target_holdings, apply_fills
 
-# Configure logging: log to both console and file, rotate daily, keep 7 days
-logger = logging.getLogger()
-logger.setLevel(logging.INFO)
-formatter = logging.Formatter('%(asctime)s [%(levelname)s] %(message)s')
+# Reuse a stored quote instead of hitting the network if it is at most this old
+PRICE_MAX_AGE_SECONDS = float(os.environ.get('PRICE_MAX_AGE_SECONDS', 60))
+# yfinance has no timeout of its own; a fetch slower than this counts as failed
+PRICE_FETCH_TIMEOUT_SECONDS = float(os.environ.get('PRICE_FETCH_TIMEOUT_SECONDS', 10))
+# When fetching fails, a stored quote up to this old is used instead (marked price_stale)
+PRICE_MAX_STALE_SECONDS = float(os.environ.get('PRICE_MAX_STALE_SECONDS', 3600))
+# When the LLM gives no allocation, the last good one up to this old is reused (marked allocation_stale)
+ALLOCATION_MAX_STALE_SECONDS = float(os.environ.get('ALLOCATION_MAX_STALE_SECONDS', 6 * 3600))
 
-# Console handler
-console_handler = logging.StreamHandler()
-console_handler.setFormatter(formatter)
-logger.addHandler(console_handler)
+# Trips on errors and fetches that hit PRICE_FETCH_TIMEOUT_SECONDS
+price_breaker = CircuitBreaker.from_env('yfinance')
+# Timed-out fetches keep running in the background, so the pool is small and shared
+price_executor = ThreadPoolExecutor(max_workers=4, thread_name_prefix='price-fetch')
 
-import os
-log_dir = 'logging'
-os.makedirs(log_dir, exist_ok=True)
-file_handler = TimedRotatingFileHandler(os.path.join(log_dir, 'trading_agent.log'), when='midnight', backupCount=7, encoding='utf-8')
-file_handler.setFormatter(formatter)
-logger.addHandler(file_handler)
+
+def fetch_yfinance_price(symbol):
+    # Imported on first network fetch; yfinance is slow to import and most runs never need it
+    import yfinance as yf
+    return yf.Ticker(symbol).info.get('regularMarketPrice')
 
 class SmartM1TradingAgent:
-    def __init__(self, api_key=None, max_investment=1000, llm_url="http://localhost:11534/mcp"):
+    def __init__(self, api_key=None, max_investment=1000, llm_url="http://localhost:11534/mcp", llm_models=None,
+                 execution=None, log_path=TRADE_LOG_JSON, analytics_path=ANALYTICS_STATE_JSON,
+                 values_path=PORTFOLIO_VALUES_JSONL, price_store=None, quote_cache=None,
+                 valuation_dir=VALUATION_STORE_DIR):
         self.api_key = api_key  # Not used in simulation mode
         self.max_investment = max_investment
         self.portfolio = {}
         self.last_rebalance = datetime.min
         self.trade_log = []
         self.mcp = MCPClient(llm_url)
+        self.log_path = log_path
+        self.analytics_path = analytics_path
+        self.values_path = values_path
+        self.valuation_dir = valuation_dir
         self.transaction_id = self._get_last_transaction_id()
         self.holdings = self._get_last_holdings()
         self.cash = self._get_last_cash()
+        # Loaded (or rebuilt from the trade log) when the first transaction is committed
+        self.analytics = None
+        self.price_store = price_store or PriceStore()
+        self.quote_cache = quote_cache or get_quote_cache()
+        # Ensemble mode queries several models/samples concurrently; off unless models are configured
+        llm_models = llm_models if llm_models is not None else LLM_ENSEMBLE_MODELS
+        self.ensemble = EnsembleQuery(self._send_to_model, llm_models) if llm_models else None
+        # Live-mode order execution; an HTTPBroker engine is created on first use
+        self.execution = execution
+        # Fallbacks for when the LLM or the price source is down
+        self.last_allocation = StaleCache(ALLOCATION_MAX_STALE_SECONDS)
+        self.portfolio_stale = False
+        self._llm_stale = False
+        self.stale_prices = set()
 
     def _get_last_transaction_id(self):
         # Read the last transaction ID from the JSON log file
-        log_data = load_trade_log()
+        log_data = load_trade_log(self.log_path)
         trades = log_data["trades"]
         if trades:
             last_id = trades[-1].get('transaction_id', '00000')
@@ -57,9 +85,33 @@ class SmartM1TradingAgent:
         return f"{self.transaction_id:05d}"
 
     def query_llm(self, prompt):
-        return self.mcp.send(prompt)
+        result = self.mcp.send(prompt)
+        if self.mcp.last_stale is True:
+            self._llm_stale = True
+        return result
+
+    def _send_to_model(self, prompt, model, options, timeout):
+        result = self.mcp.send(prompt, model=model, options=options, timeout=timeout)
+        if self.mcp.last_stale is True:
+            self._llm_stale = True
+        return result
 
     def generate_portfolio_with_llm(self):
+        self._llm_stale = False
+        self._query_portfolio()
+        self.portfolio_stale = self._llm_stale
+        if self.portfolio:
+            if not self.portfolio_stale:
+                self.last_allocation.put('portfolio', dict(self.portfolio))
+            return
+        # Stale-while-revalidate: keep trading the last good allocation while the LLM is unavailable
+        stale = self.last_allocation.get('portfolio')
+        if stale:
+            self.portfolio = dict(stale[0])
+            self.portfolio_stale = True
+            logging.warning(f"Reusing allocation from {stale[1]:.0f}s ago: {self.portfolio}")
+
+    def _query_portfolio(self):
         prompt = (
             "You are an expert in financial matters including Stocks, Options, and Crypto trading. "
             "Your goal is to aggressively maximize short-term profitability. "
@@ -70,6 +122,13 @@ class SmartM1TradingAgent:
             "Reply ONLY with a JSON object like: {\"AAPL\": 0.4, \"DOGE-USD\": 0.3, \"TSLA\": 0.3} representing recommended allocation ratios. "
             "Avoid explanations or disclaimers."
         )
+        if self.ensemble:
+            self.portfolio = self.ensemble.run(prompt)
+            if self.portfolio:
+                logging.info(f"LLM ensemble portfolio ({self.ensemble.rule}): {self.portfolio}")
+            else:
+                logging.error("LLM ensemble returned no valid allocation before the deadline.")
+            return
         result = self.query_llm(prompt)
         logging.info(f"Raw LLM result: {result}")
         try:
@@ -92,7 +151,7 @@ class SmartM1TradingAgent:
     def _get_last_holdings(self):
         # Read last holdings from the JSON log file
         holdings = {}
-        log_data = load_trade_log()
+        log_data = load_trade_log(self.log_path)
         trades = log_data["trades"]
         if trades:
             last_tid = trades[-1]['transaction_id']
@@ -103,7 +162,7 @@ class SmartM1TradingAgent:
 
     def _get_last_cash(self):
         # Read last cash from the JSON log file
-        log_data = load_trade_log()
+        log_data = load_trade_log(self.log_path)
         trades = log_data["trades"]
         if trades:
             last_tid = trades[-1]['transaction_id']
@@ -111,6 +170,55 @@ class SmartM1TradingAgent:
             return last_trades[0].get('cash', self.max_investment)
         return self.max_investment
 
+    def get_price(self, symbol):
+        # Serve recent quotes from the shared quote cache or the local price store, otherwise fetch and record
+        price = self.quote_cache.get_fresh(symbol, PRICE_MAX_AGE_SECONDS)
+        if price is not None:
+            return price
+        if self.price_store.is_fresh(symbol, PRICE_MAX_AGE_SECONDS):
+            return self.price_store.latest(symbol)[1]
+        try:
+            price = price_breaker.call(self._fetch_price, symbol)
+        except CircuitOpenError:
+            price = None
+        except Exception as e:
+            logging.warning(f"Failed to fetch price for {symbol}: {e!r}")
+            price = None
+        if price is not None:
+            now = time.time_ns()
+            self.price_store.append(symbol, now, price)
+            self.quote_cache.put(symbol, price, now)
+            return price
+        return self._stale_price(symbol)
+
+    def _fetch_price(self, symbol):
+        return price_executor.submit(fetch_yfinance_price, symbol).result(timeout=PRICE_FETCH_TIMEOUT_SECONDS)
+
+    def _stale_price(self, symbol):
+        # Newest stored quote, if it is within the staleness bound
+        quote = self.quote_cache.get(symbol)
+        quotes = [quote] if quote else []
+        latest = self.price_store.latest(symbol)
+        if latest is not None:
+            quotes.append((latest[1], latest[0]))
+        if not quotes:
+            return None
+        price, ts = max(quotes, key=lambda q: q[1])
+        age = (time.time_ns() - ts) / 1_000_000_000
+        if age > PRICE_MAX_STALE_SECONDS:
+            return None
+        logging.warning(f"Using stale price for {symbol} from {age:.0f}s ago")
+        self.stale_prices.add(symbol)
+        return price
+
+    def _mark_stale(self, trade):
+        # Flag rows built on fallback data; extra keys round-trip through the trade log
+        if trade['symbol'] in self.stale_prices:
+            trade['price_stale'] = True
+        if self.portfolio_stale:
+            trade['allocation_stale'] = True
+        return trade
+
     def simulate_orders(self):
         logging.info("Simulating orders with buy/sell logic...")
         new_trades = []
@@ -118,19 +226,13 @@ class SmartM1TradingAgent:
         transaction_id = self._get_next_transaction_id()
         timestamp = now.strftime("%H:%M:%S")
         date = now.strftime("%d-%m-%y")
+        self.stale_prices = set()
         prev_portfolio = self.portfolio.copy() if hasattr(self, 'portfolio') else {}
         prev_holdings = self.holdings.copy()
         prev_cash = self.cash
         # Fetch prices for all symbols in union of old and new allocations
         all_symbols = set(prev_holdings.keys()).union(self.portfolio.keys())
-        prices = {}
-        for symbol in all_symbols:
-            try:
-                ticker = yf.Ticker(symbol)
-                prices[symbol] = ticker.info.get('regularMarketPrice')
-            except Exception as e:
-                logging.warning(f"Failed to fetch price for {symbol}: {e}")
-                prices[symbol] = None
+        prices = {symbol: self.get_price(symbol) for symbol in all_symbols}
         # Process all symbols in union of old and new allocations
         cash = prev_cash
         for symbol in all_symbols:
@@ -180,9 +282,13 @@ class SmartM1TradingAgent:
                     "allocation": alloc,
                     "cash": cash  # cash after this trade
                 }
+                self._mark_stale(trade)
                 self.trade_log.append(trade)
                 new_trades.append(trade)
                 logging.info(f"{action} {abs(shares_changed):.4f} shares of {symbol} @ ${price if price is not None else 'N/A'} (now holding {shares_held:.4f}), cash: ${cash:.2f}")
+        self._commit_transaction(new_trades, prices, cash)
+
+    def _commit_transaction(self, new_trades, prices, cash):
         # After all trades, compute portfolio value
         portfolio_value = cash
         for symbol, shares in self.holdings.items():
@@ -195,8 +301,82 @@ class SmartM1TradingAgent:
             trade['final_cash'] = cash
         self.cash = cash
         self._log_trades_to_json(new_trades)
+        self._update_analytics(new_trades)
         self.publish_trades_to_mcp()
 
+    def rebalance_portfolio(self):
+        logging.info("Rebalancing portfolio through the broker...")
+        if self.execution is None:
+            self.execution = ExecutionEngine(HTTPBroker(api_key=self.api_key))
+        now = datetime.now()
+        self.stale_prices = set()
+        all_symbols = set(self.holdings.keys()).union(self.portfolio.keys())
+        prices = {symbol: self.get_price(symbol) for symbol in all_symbols}
+        targets = target_holdings(self.portfolio, prices, self.max_investment)
+        # Unpriced symbols keep their shares unless the allocation dropped them
+        for symbol in all_symbols:
+            if symbol not in targets and self.portfolio.get(symbol, 0) > 0:
+                targets[symbol] = self.holdings.get(symbol, 0)
+        orders = self.execution.execute(plan_orders(self.holdings, targets, prices), cash=self.cash)
+        by_symbol = {order.symbol: order for order in orders}
+        # Reconcile: the log records what filled, not what was requested
+        prev_holdings = self.holdings.copy()
+        self.holdings, cash = apply_fills(orders, self.holdings, self.cash)
+        transaction_id = self._get_next_transaction_id()
+        new_trades = []
+        running_cash = self.cash
+        # Rows follow execution order (sells, then buys), so each row's cash is the real
+        # balance after that order; symbols without an order come last
+        sequence = [order.symbol for order in orders] + sorted(all_symbols - set(by_symbol))
+        for symbol in sequence:
+            alloc = self.portfolio.get(symbol, 0)
+            order = by_symbol.get(symbol)
+            shares_changed = order.signed_filled if order else 0.0
+            fill_price = order.avg_price if order and order.avg_price is not None else prices.get(symbol)
+            amount = abs(shares_changed) * (fill_price or 0)
+            action = 'Buy' if shares_changed > 0 else 'Sell' if shares_changed < 0 else 'Hold'
+            running_cash -= shares_changed * (fill_price or 0)
+            if action == 'Hold' and not alloc and not order:
+                continue
+            trade = {
+                "transaction_id": transaction_id,
+                "time": now.strftime("%H:%M:%S"),
+                "date": now.strftime("%d-%m-%y"),
+                "symbol": symbol,
+                "action": action,
+                "shares_changed": shares_changed,
+                "shares_held": self.holdings.get(symbol, prev_holdings.get(symbol, 0)),
+                "current_price": fill_price,
+                "amount": amount,
+                "allocation": alloc,
+                "cash": running_cash
+            }
+            if order:
+                trade.update({"order_id": order.order_id, "order_status": order.status,
+                              "requested_shares": order.quantity if order.side == 'buy' else -order.quantity})
+            self._mark_stale(trade)
+            self.trade_log.append(trade)
+            new_trades.append(trade)
+            logging.info(f"{action} {abs(shares_changed):.4f} shares of {symbol} @ ${fill_price if fill_price is not None else 'N/A'} "
+                         f"({order.status if order else 'no order'}), cash: ${running_cash:.2f}")
+        self._commit_transaction(new_trades, prices, cash)
+
+    def _update_analytics(self, new_trades):
+        # Fold the committed transaction into the running analytics state
+        if self.analytics is None:
+            self.analytics = load_analytics(self.analytics_path, self.values_path, log_path=self.log_path,
+                                            store_dir=self.valuation_dir)
+        # Snapshots the valuation service took since the last transaction count toward drawdown
+        folded = self.analytics.fold_intraday(load_intraday_values(start=self.analytics.intraday_ts + 1,
+                                                                   store_dir=self.valuation_dir))
+        updated = self.analytics.update(new_trades)
+        if folded or updated:
+            save_analytics(self.analytics, self.analytics_path)
+        if updated:
+            append_value_point(self.analytics, self.values_path)
+            snapshot = self.analytics.snapshot()
+            logging.info(f"Analytics: value ${snapshot['portfolio_value']:.2f}, realized P&L ${snapshot['realized_pnl']:.2f}, unrealized P&L ${snapshot['unrealized_pnl']:.2f}, max drawdown {snapshot['max_drawdown']*100:.2f}%")
+
     def publish_trades_to_mcp(self):
         if self.trade_log:
             result = self.mcp.record_trades(self.trade_log)
@@ -204,14 +384,14 @@ class SmartM1TradingAgent:
 
     def _log_trades_to_json(self, new_trades):
         # Unified log structure: {"new_trade": true/false, "trades": [...]}
-        log_data = load_trade_log()
+        log_data = load_trade_log(self.log_path)
         # Append new trades
         log_data["trades"].extend(new_trades)
         # Set new_trade flag if any buy/sell
         if any(trade['action'] in ('Buy', 'Sell') for trade in new_trades):
             log_data["new_trade"] = True
-        save_trade_log(log_data)
-        logging.info(f"Trade log saved to {os.environ.get('TRADE_LOG_JSON', 'trade_log.json')}")
+        save_trade_log(log_data, self.log_path)
+        logging.info(f"Trade log saved to {self.log_path}")
 
     def should_rebalance(self):
         return (datetime.now() - self.last_rebalance) >= timedelta(days=1)
@@ -249,6 +429,10 @@ class SmartM1TradingAgent:
             logging.info("Continuous trading agent loop stopped by user.")
 
 if __name__ == "__main__":
+    # Console and logging/trading_agent.jsonl, written off the trading thread
+    configure_logging('trading_agent')
     api_key = "YOUR_M1_API_KEY"
     agent = SmartM1TradingAgent(api_key, llm_url="http://localhost:11534/mcp")
-    agent.run_continuous(simulate=True, interval_minutes=2)
\ No newline at end of file
+    # TRADING_SIMULATE=0 sends orders to the broker at BROKER_URL (e.g. services/mock_broker.py)
+    simulate = os.environ.get('TRADING_SIMULATE', '1') != '0'
+    agent.run_continuous(simulate=simulate, interval_minutes=2)
\ No newline at end of file
@@ -1,13 +1,12 @@
-import requests
 import smtplib
 from email.message import EmailMessage
 import json
 import os
 import sys
 from datetime import datetime
-from collections import defaultdict
 sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
 from utils.mcp_client import MCPClient
+from utils.trade_record import Trade, decode_tids, group_indices
 # Remove: from utils.trade_log_utils import load_trade_log, save_trade_log
 
 log_dir = 'logging'
@@ -44,31 +43,27 @@ class TradeVerificationAgent:
         self.mcp.send(prompt)
 
     def format_email_body(self, trades):
-        # Group trades by transaction_id
-        transactions = defaultdict(list)
-        for trade in trades:
-            transactions[trade['transaction_id']].append(trade)
-        # Sort by transaction_id (as int)
-        sorted_ids = sorted(transactions.keys(), key=lambda x: int(x))
+        # Group on transaction ids alone, then decode each row once
+        groups = group_indices(decode_tids(trades))
         lines = [f"Trade Summary - {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}", ""]
         prev_total = None
-        for tid in sorted_ids:
-            batch = transactions[tid]
+        # Grouped by numeric transaction_id, ascending
+        for tid, rows in groups.items():
+            tx_trades = [Trade.from_dict(trades[i]) for i in rows]
             # Assume all trades in batch have same time/date
-            t_time = batch[0]['time']
-            t_date = batch[0]['date']
-            total = sum(trade['amount'] for trade in batch)
+            first = tx_trades[0]
+            total = sum(trade.amount for trade in tx_trades)
             delta = f" (+{total - prev_total:.2f})" if prev_total is not None else ""
-            lines.append(f"Transaction {tid} at {t_time} on {t_date} | Total: ${total:.2f}{delta}")
-            for trade in batch:
-                alloc_pct = f"{trade['allocation']*100:.1f}%"
-                price = trade['current_price'] if trade['current_price'] is not None else 'N/A'
+            lines.append(f"Transaction {first.transaction_id} at {first.time} on {first.date} | Total: ${total:.2f}{delta}")
+            for trade in tx_trades:
+                alloc_pct = f"{trade.allocation*100:.1f}%"
+                price = trade.price if trade.price == trade.price else 'N/A'
                 if price != 'N/A' and price != 0:
-                    shares = trade['amount'] / price
+                    shares = trade.amount / price
                     shares_str = f"{shares:.4f} shares"
                 else:
                     shares_str = "N/A shares"
-                lines.append(f"  {trade['symbol']}: {alloc_pct} @ ${price} | Amount: ${trade['amount']:.2f} | {shares_str}")
+                lines.append(f"  {trade.symbol}: {alloc_pct} @ ${price} | Amount: ${trade.amount:.2f} | {shares_str}")
             lines.append("")
             prev_total = total
         return "\n".join(lines)
@@ -95,7 +90,7 @@ class TradeVerificationAgent:
             email_body = self.format_email_body(trades)
             self.send_email(email_body)
             # Mark all trades up to the latest transaction_id as verified
-            last_id = max(int(t['transaction_id']) for t in trades)
+            last_id = max(decode_tids(trades))
             self.mark_trades_verified(up_to_id=last_id)
         else:
             print("No new trades to verify.")
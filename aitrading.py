@@ -9,6 +9,7 @@ MCP_SERVER = os.path.join('utils', 'mcp_server.py')
 TRADING_AGENT = os.path.join('agents', 'trading_agent.py')
 VERIFICATION_AGENT = os.path.join('agents', 'verification_agent.py')
 DASHBOARD = os.path.join('services', 'dashboard.py')
+VALUATION_SERVICE = os.path.join('services', 'valuation_service.py')
 LOG_DIR = 'logging'
 
 # Log files
@@ -16,13 +17,15 @@ MCP_LOG = os.path.join(LOG_DIR, 'mcp_server.log')
 TRADING_LOG = os.path.join(LOG_DIR, 'trading_agent.log')
 VERIFICATION_LOG = os.path.join(LOG_DIR, 'verification_agent.log')
 DASHBOARD_LOG = os.path.join(LOG_DIR, 'dashboard.log')
+VALUATION_LOG = os.path.join(LOG_DIR, 'valuation_service.log')
 
 # Process names for stopping
 PROCESS_NAMES = [
     MCP_SERVER,
     TRADING_AGENT,
     VERIFICATION_AGENT,
-    DASHBOARD
+    DASHBOARD,
+    VALUATION_SERVICE
 ]
 
 
@@ -33,6 +36,7 @@ def start_all():
         (['python3', TRADING_AGENT], TRADING_LOG),
         (['python3', DASHBOARD], DASHBOARD_LOG),
         (['python3', VERIFICATION_AGENT], VERIFICATION_LOG),
+        (['python3', VALUATION_SERVICE], VALUATION_LOG),
     ]
     for cmd, logfile in procs:
         with open(logfile, 'a') as f:
@@ -42,6 +46,7 @@ def start_all():
     print(f"Trading agent log: {TRADING_LOG}")
     print(f"Verification agent log: {VERIFICATION_LOG}")
     print(f"Dashboard log: {DASHBOARD_LOG}")
+    print(f"Valuation service log: {VALUATION_LOG}")
     print("Dashboard: http://localhost:8050")
 
 
@@ -0,0 +1,92 @@
+import os
+import sys
+import json
+import time
+import argparse
+import subprocess
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+
+# Cold-start budget per entry point: wall-clock milliseconds for a fresh interpreter
+# to import the module, interpreter startup included. Scale with STARTUP_BUDGET_SCALE
+# on slow machines.
+STARTUP_BUDGETS_MS = {
+    'agents.trading_agent': 800,
+    'agents.verification_agent': 500,
+    'utils.mcp_client': 500,
+    'utils.mcp_server': 1200,
+    'services.valuation_service': 600,
+    'services.dashboard': 3000,
+}
+
+# Heavy dependencies that must only load on the code paths that use them
+LAZY_IMPORTS = {
+    'agents.trading_agent': ['matplotlib', 'yfinance', 'pandas'],
+    'agents.verification_agent': ['matplotlib', 'yfinance', 'pandas', 'numpy'],
+    'services.valuation_service': ['yfinance', 'pandas'],
+    'services.dashboard': ['yfinance', 'pandas'],
+}
+
+
+def _import_command(module, extra=""):
+    return [sys.executable, '-c', f"import sys; sys.path.insert(0, {ROOT!r}); import {module}{extra}"]
+
+
+def measure_import(module, repeat=3, cwd=None):
+    """Best-of-repeat wall time in ms to import module in a fresh interpreter."""
+    best = None
+    for _ in range(repeat):
+        started = time.perf_counter()
+        subprocess.run(_import_command(module), cwd=cwd or ROOT, check=True, capture_output=True)
+        elapsed = (time.perf_counter() - started) * 1000
+        best = elapsed if best is None else min(best, elapsed)
+    return best
+
+
+def loaded_modules(module, candidates, cwd=None):
+    """Which of the candidate top-level packages are in sys.modules after importing module."""
+    extra = f"; import json; print(json.dumps([m for m in {list(candidates)!r} if m in sys.modules]))"
+    result = subprocess.run(_import_command(module, extra), cwd=cwd or ROOT, check=True, capture_output=True, text=True)
+    return json.loads(result.stdout.strip().splitlines()[-1])
+
+
+def profile_imports(module, top=10, cwd=None):
+    """Heaviest imports by cumulative time (us), parsed from python -X importtime."""
+    command = _import_command(module)
+    command.insert(1, '-X')
+    command.insert(2, 'importtime')
+    result = subprocess.run(command, cwd=cwd or ROOT, check=True, capture_output=True, text=True)
+    rows = []
+    for line in result.stderr.splitlines():
+        if not line.startswith('import time:') or 'cumulative' in line:
+            continue
+        self_us, cumulative_us, name = line[len('import time:'):].split('|')
+        rows.append((int(cumulative_us), int(self_us), name.strip()))
+    rows.sort(reverse=True)
+    return rows[:top]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Measure cold-start import time of each entry point.")
+    parser.add_argument('modules', nargs='*', default=list(STARTUP_BUDGETS_MS))
+    parser.add_argument('--repeat', type=int, default=3)
+    parser.add_argument('--top', type=int, default=0, help="Also show the N heaviest imports per module")
+    args = parser.parse_args()
+    scale = float(os.environ.get('STARTUP_BUDGET_SCALE', 1))
+    over = 0
+    for module in args.modules:
+        elapsed = measure_import(module, repeat=args.repeat)
+        budget = STARTUP_BUDGETS_MS.get(module)
+        status = ''
+        if budget is not None:
+            over_budget = elapsed > budget * scale
+            over += over_budget
+            status = f"budget {budget * scale:.0f} ms {'OVER' if over_budget else 'ok'}"
+        print(f"{module:32s} {elapsed:8.1f} ms  {status}")
+        for cumulative_us, self_us, name in profile_imports(module, top=args.top) if args.top else []:
+            print(f"    {cumulative_us / 1000:8.1f} ms cumulative {self_us / 1000:7.1f} ms self  {name}")
+    sys.exit(1 if over else 0)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,74 @@
+import os
+import sys
+import time
+import argparse
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+from utils.trade_record import Trade, parse_timestamp, decode_tids, select_indices, group_indices
+
+SYMBOLS = ('AAPL', 'MSFT', 'TSLA', 'NVDA', 'DOGE-USD')
+
+
+def make_rows(count, per_transaction=len(SYMBOLS)):
+    """Synthetic legacy trade rows, per_transaction rows per transaction, one minute apart."""
+    rows = []
+    for i in range(count):
+        tid = i // per_transaction + 1
+        minute = tid % (24 * 60)
+        rows.append({
+            "transaction_id": f"{tid:05d}",
+            "time": f"{minute // 60:02d}:{minute % 60:02d}:00",
+            "date": f"{tid // (24 * 60) % 28 + 1:02d}-06-24",
+            "symbol": SYMBOLS[i % len(SYMBOLS)],
+            "action": "Buy",
+            "shares_changed": 1.0,
+            "shares_held": 1.0,
+            "current_price": 100.0,
+            "amount": 100.0,
+            "allocation": 0.2,
+            "cash": 0.0,
+        })
+    return rows
+
+
+def best_of(fn, repeat):
+    timings = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        fn()
+        timings.append(time.perf_counter() - started)
+    return min(timings)
+
+
+def run(count, repeat=3):
+    """Seconds for the full-decode and tid-only paths: {case: (full, tids)}."""
+    rows = make_rows(count)
+    end_tid = int(rows[-1]['transaction_id']) // 2
+    results = {}
+    # The full decode caches timestamp parsing, so clear it to measure a cold first call
+    def full_filter():
+        parse_timestamp.cache_clear()
+        trades = [Trade.from_dict(row) for row in rows]
+        return [i for i, trade in enumerate(trades) if trade.tid <= end_tid]
+
+    def full_group():
+        parse_timestamp.cache_clear()
+        trades = [Trade.from_dict(row) for row in rows]
+        return group_indices([trade.tid for trade in trades])
+
+    results['filter'] = (best_of(full_filter, repeat),
+                         best_of(lambda: select_indices(decode_tids(rows), end_tid=end_tid), repeat))
+    results['group'] = (best_of(full_group, repeat), best_of(lambda: group_indices(decode_tids(rows)), repeat))
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare decoding every row into a Trade with the tid-only paths.")
+    parser.add_argument('--rows', type=int, default=50000)
+    parser.add_argument('--repeat', type=int, default=3)
+    args = parser.parse_args()
+    for case, (full, tids) in run(args.rows, args.repeat).items():
+        print(f"{case:8s} {args.rows} rows: full decode {full:.3f}s  tid-only {tids:.3f}s  ({full / tids:.0f}x)")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,60 @@
+// Push updates for the dashboard: the server streams only new transactions over
+// /updates (server-sent events) and these callbacks patch the page in place.
+function connectDashboardUpdates() {
+    var cursor = window.dashboardCursor;
+    var source = new EventSource('/updates?after=' + cursor.tid + '&after_ts=' + cursor.ts);
+    source.onmessage = function(event) {
+        var delta = JSON.parse(event.data);
+        if (delta.transaction_id !== undefined) {
+            if (delta.transaction_id <= cursor.tid) {
+                return;
+            }
+            cursor.tid = delta.transaction_id;
+        }
+        if (delta.intraday_ts !== undefined) {
+            cursor.ts = Math.max(cursor.ts, delta.intraday_ts);
+        }
+        window.dash_clientside.set_props('push-delta', {data: delta});
+    };
+    // Reconnect from the last applied transaction so no point is appended twice
+    source.onerror = function() {
+        source.close();
+        setTimeout(connectDashboardUpdates, 5000);
+    };
+}
+
+// Deltas carry only the pie's labels and values; layout and template stay as rendered
+function patchPie(figure, pie) {
+    var trace = Object.assign({}, (figure && figure.data && figure.data[0]) || {type: 'pie', hole: 0.4}, pie);
+    return Object.assign({}, figure, {data: [trace]});
+}
+
+window.dash_clientside = Object.assign({}, window.dash_clientside, {
+    dashboard: {
+        subscribe: function(cursor) {
+            if (window.dashboardCursor === undefined) {
+                window.dashboardCursor = cursor || {tid: 0, ts: 0};
+                connectDashboardUpdates();
+            }
+            return window.dash_clientside.no_update;
+        },
+        applyDelta: function(delta, pieFigure) {
+            var no_update = window.dash_clientside.no_update;
+            if (!delta) {
+                return Array(7).fill(no_update);
+            }
+            // Intraday-only deltas leave the transaction outputs untouched
+            var hasTransaction = delta.transaction_id !== undefined;
+            var hasIntraday = delta.intraday_y !== undefined;
+            return [
+                hasTransaction ? [{x: [delta.x], y: [delta.y]}, [0]] : no_update,
+                hasIntraday ? [{x: [[delta.intraday_x]], y: [[delta.intraday_y]]}, [0]] : no_update,
+                hasTransaction ? patchPie(pieFigure, delta.pie) : no_update,
+                hasTransaction ? delta.rows : no_update,
+                hasTransaction ? delta.value_text : no_update,
+                hasTransaction ? delta.analytics_text : no_update,
+                hasIntraday ? delta.intraday_text : no_update
+            ];
+        }
+    }
+});
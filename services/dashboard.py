@@ -4,126 +4,275 @@ from dash import dcc, html, dash_table
 import plotly.graph_objs as go
 import json
 import os
-import pandas as pd
-from dash.dependencies import Input, Output
-from flask import Response
+import threading
+import time
+from datetime import datetime, timezone
+from dash.dependencies import Input, Output, State, ClientsideFunction
+from flask import Response, request, stream_with_context
 import sys
 sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
-from utils.trade_log_utils import load_trade_log
+from utils.trade_log_utils import load_trade_log, load_trade_range, TRADE_LOG_JSON
+from utils.log_config import configure_logging
+from utils.portfolio_analytics import load_analytics, load_value_history, PORTFOLIO_VALUES_JSONL, VALUATION_STORE_DIR, VALUATION_SERIES
+from utils.price_store import PriceStore
+from utils.quote_cache import get_quote_cache
 
-TRADE_LOG_JSON = os.environ.get('TRADE_LOG_JSON', 'trade_log.json')
+price_store = PriceStore()
+value_store = PriceStore(VALUATION_STORE_DIR)
+PRICE_HISTORY_DAYS = int(os.environ.get('PRICE_HISTORY_DAYS', 30))
+# Intraday value snapshots shown on first render; later ones are pushed
+INTRADAY_HISTORY_HOURS = float(os.environ.get('DASHBOARD_INTRADAY_HOURS', 24))
+# How often the server stats the value series for new transactions (local only, nothing is sent)
+WATCH_POLL_SECONDS = float(os.environ.get('DASHBOARD_WATCH_POLL_SECONDS', 1))
+# Idle push connections send an SSE comment this often to stay open
+KEEPALIVE_SECONDS = float(os.environ.get('DASHBOARD_KEEPALIVE_SECONDS', 15))
 
-# Helper to load and process trades
-def load_trades():
-    log_data = load_trade_log()
-    trades = log_data.get('trades', [])
-    if not trades:
-        return pd.DataFrame()
-    df = pd.DataFrame(trades)
-    if df.empty:
-        return df
-    # Group by transaction_id for portfolio value over time
-    df['transaction_id'] = df['transaction_id'].astype(str)
-    df['total'] = df.groupby('transaction_id')['amount'].transform('sum')
-    df['datetime'] = df['date'] + ' ' + df['time']
-    return df
-
-def get_portfolio_value_trace(df):
-    # Only one row per transaction_id
-    df_tx = df.drop_duplicates('transaction_id')
+def get_portfolio_value_trace(points):
+    # Mark-to-market value per transaction, maintained by the analytics module
     return go.Scatter(
-        x=df_tx['datetime'],
-        y=df_tx['total'],
+        x=[p['datetime'] for p in points],
+        y=[p['value'] for p in points],
         mode='lines+markers',
         name='Portfolio Value'
     )
 
-def get_allocation_pie_trace(df):
+def get_price_history_traces(symbols):
+    # Read recent history straight from the local price store, no network calls
+    start = time.time_ns() - PRICE_HISTORY_DAYS * 86400 * 1_000_000_000
+    traces = []
+    for symbol in symbols:
+        records = price_store.read_range(symbol, start=start)
+        if not len(records):
+            continue
+        traces.append(go.Scatter(
+            x=(records['ts'] // 1_000_000).astype('datetime64[ms]'),
+            y=records['close'],
+            mode='lines',
+            name=symbol
+        ))
+    return traces
+
+def get_analytics_text():
+    snapshot = load_analytics(rebuild=False).snapshot()
+    return (
+        f"Realized P&L: ${snapshot['realized_pnl']:,.2f} | "
+        f"Unrealized P&L: ${snapshot['unrealized_pnl']:,.2f} | "
+        f"Max Drawdown: {snapshot['max_drawdown']*100:.2f}% | "
+        f"Volatility: {snapshot['volatility']*100:.2f}% | "
+        f"Sharpe: {snapshot['sharpe']:.2f} | "
+        f"Turnover: ${snapshot['turnover']:,.2f}"
+    )
+
+def get_allocation_pie_trace(latest_trades):
     # Use the latest transaction
-    latest_tx = df[df['transaction_id'] == df['transaction_id'].max()]
     return go.Pie(
-        labels=latest_tx['symbol'],
-        values=latest_tx['allocation'],
+        labels=[t['symbol'] for t in latest_trades],
+        values=[t['allocation'] for t in latest_trades],
         name='Current Allocation',
         hole=0.4
     )
 
-def get_trades_table(df):
-    # Show the latest N trades
-    latest_tx = df[df['transaction_id'] == df['transaction_id'].max()]
-    return dash_table.DataTable(
-        columns=[
-            {"name": "Symbol", "id": "symbol"},
-            {"name": "Allocation (%)", "id": "allocation"},
-            {"name": "Current Price", "id": "current_price"},
-            {"name": "Amount", "id": "amount"},
-        ],
-        data=[{
-            "symbol": row['symbol'],
-            "allocation": f"{row['allocation']*100:.1f}",
-            "current_price": row['current_price'] if row['current_price'] is not None else 'N/A',
-            "amount": f"{row['amount']:.2f}"
-        } for _, row in latest_tx.iterrows()],
-        style_table={'overflowX': 'auto'},
-        style_cell={'textAlign': 'center'},
-        style_header={'fontWeight': 'bold'},
+def get_latest_trades(trades, tid=None):
+    # Rows of the given (default: newest) transaction
+    if not trades:
+        return []
+    tid = int(trades[-1]['transaction_id']) if tid is None else tid
+    return [t for t in trades if int(t['transaction_id']) == tid]
+
+# Columns of the trades table; get_trade_rows fills one field per column
+TRADE_COLUMNS = [
+    {"name": "Symbol", "id": "symbol"},
+    {"name": "Allocation (%)", "id": "allocation"},
+    {"name": "Current Price", "id": "current_price"},
+    {"name": "Last Quote", "id": "last_quote"},
+    {"name": "Amount", "id": "amount"},
+]
+
+def get_trade_rows(latest_trades):
+    return [{
+        "symbol": t['symbol'],
+        "allocation": f"{t['allocation']*100:.1f}",
+        "current_price": t['current_price'] if t['current_price'] is not None else 'N/A',
+        "last_quote": get_last_quote(t['symbol']),
+        "amount": f"{t['amount']:.2f}"
+    } for t in latest_trades]
+
+def get_last_quote(symbol):
+    # Latest quote any service has published to the shared cache; never fetched from here
+    quote = get_quote_cache().get(symbol)
+    return f"{quote[0]:.2f}" if quote else 'N/A'
+
+def get_value_text(latest_trades):
+    if not latest_trades:
+        return "Portfolio Value: $0.00 | Cash: $0.00"
+    portfolio_value = latest_trades[-1].get('portfolio_value', 0)
+    cash = latest_trades[-1].get('final_cash', 0)
+    return f"Portfolio Value: ${portfolio_value:,.2f} | Cash: ${cash:,.2f}"
+
+def get_intraday_trace(records):
+    # Snapshots from the valuation service between rebalances, read from the memory-mapped series
+    return go.Scatter(
+        x=(records['ts'] // 1_000_000).astype('datetime64[ms]'),
+        y=records['close'],
+        mode='lines',
+        name='Intraday Value'
     )
 
-def get_buy_sell_table(df):
-    # Sort by transaction_id and symbol
-    df = df.sort_values(['transaction_id', 'symbol'])
-    # Build a dict: {transaction_id: {symbol: trade}}
-    tx_map = {}
-    for tid, group in df.groupby('transaction_id'):
-        tx_map[tid] = {row['symbol']: row for _, row in group.iterrows()}
-    sorted_ids = sorted(tx_map.keys(), key=lambda x: int(x))
-    rows = []
-    prev_tx = None
-    for tid in sorted_ids:
-        tx = tx_map[tid]
-        if prev_tx is not None:
-            all_symbols = set(tx.keys()).union(prev_tx.keys())
-            for symbol in all_symbols:
-                prev_alloc = prev_tx.get(symbol, {}).get('allocation', 0)
-                prev_price = prev_tx.get(symbol, {}).get('current_price', None)
-                curr_alloc = tx.get(symbol, {}).get('allocation', 0)
-                curr_price = tx.get(symbol, {}).get('current_price', None)
-                alloc_delta = curr_alloc - prev_alloc
-                price_delta = (curr_price - prev_price) if (curr_price is not None and prev_price is not None) else None
-                if alloc_delta > 0:
-                    action = 'Buy'
-                elif alloc_delta < 0:
-                    action = 'Sell'
-                else:
-                    action = 'Hold'
-                rows.append({
-                    'transaction_id': tid,
-                    'symbol': symbol,
-                    'action': action,
-                    'alloc_change': f"{alloc_delta*100:+.1f}",
-                    'price_change': f"{price_delta:+.2f}" if price_delta is not None else 'N/A',
-                    'time': tx.get(symbol, {}).get('time', ''),
-                    'date': tx.get(symbol, {}).get('date', ''),
-                })
-        prev_tx = tx
-    if not rows:
-        return html.P("No buy/sell actions yet.", style={'color': light_text})
-    return dash_table.DataTable(
-        columns=[
-            {"name": "Transaction ID", "id": "transaction_id"},
-            {"name": "Symbol", "id": "symbol"},
-            {"name": "Action", "id": "action"},
-            {"name": "Allocation Change (%)", "id": "alloc_change"},
-            {"name": "Price Change ($)", "id": "price_change"},
-            {"name": "Time", "id": "time"},
-            {"name": "Date", "id": "date"},
-        ],
-        data=rows,
-        style_table={'overflowX': 'auto', 'backgroundColor': dark_card},
-        style_cell={'textAlign': 'center', 'backgroundColor': dark_card, 'color': light_text},
-        style_header={'fontWeight': 'bold', 'backgroundColor': accent, 'color': dark_bg},
-        page_size=20,
+def format_intraday_x(ts):
+    # Same naive-UTC form plotly gives the datetime64 x values of the first render
+    return datetime.fromtimestamp(ts / 1_000_000_000, tz=timezone.utc).strftime('%Y-%m-%dT%H:%M:%S.%f')[:-3]
+
+def build_intraday_delta(intraday):
+    """Push payload for a new intraday snapshot: the point to append and the summary text."""
+    ts, value = intraday
+    return {"intraday_ts": ts, "intraday_x": format_intraday_x(ts), "intraday_y": value,
+            "intraday_text": get_intraday_text(intraday)}
+
+def get_intraday_text(intraday):
+    # Latest snapshot from the valuation service, if it is running
+    if intraday is None:
+        return ""
+    ts, value = intraday
+    as_of = datetime.fromtimestamp(ts / 1_000_000_000, tz=timezone.utc).strftime('%H:%M:%S')
+    return f"Intraday Value: ${value:,.2f} (as of {as_of} UTC)"
+
+def get_pie_figure(latest_trades):
+    pie_fig = go.Figure([get_allocation_pie_trace(latest_trades)])
+    pie_fig.update_layout(
+        title="Current Allocation",
+        plot_bgcolor=dark_card,
+        paper_bgcolor=dark_bg,
+        font_color=light_text,
+        title_font_color=accent,
+        legend=dict(font=dict(color=light_text)),
     )
+    return pie_fig
+
+def build_delta(trades, points, after_tid):
+    """
+    Everything the client needs to move from transaction after_tid to the newest one:
+    new value points to append, plus the latest allocation, rows and summary text.
+    Returns None when nothing newer exists.
+    """
+    new_points = [p for p in points if p['transaction_id'] > after_tid]
+    if not new_points:
+        return None
+    tid = new_points[-1]['transaction_id']
+    latest_trades = get_latest_trades(trades, tid)
+    return {
+        "transaction_id": tid,
+        "x": [p['datetime'] for p in new_points],
+        "y": [p['value'] for p in new_points],
+        # Only the pie's data; the client patches it into the figure it already has
+        "pie": {"labels": [t['symbol'] for t in latest_trades], "values": [t['allocation'] for t in latest_trades]},
+        "rows": get_trade_rows(latest_trades),
+        "value_text": get_value_text(latest_trades),
+        "analytics_text": get_analytics_text(),
+    }
+
+def read_last_transaction_id(values_path=PORTFOLIO_VALUES_JSONL):
+    # Only the tail of the value series is read
+    points = read_value_points_after(None, values_path)
+    return points[-1]['transaction_id'] if points else 0
+
+def read_value_points_after(after_tid, values_path=PORTFOLIO_VALUES_JSONL, block_size=4096):
+    """
+    Value points with transaction_id > after_tid, read backwards from the end of the
+    file one block at a time, so the cost follows the number of new points rather
+    than the length of the history. With after_tid None, only the last point.
+    """
+    points = []
+    try:
+        with open(values_path, 'rb') as f:
+            end = f.seek(0, os.SEEK_END)
+            tail = b''
+            while end > 0:
+                start = max(end - block_size, 0)
+                f.seek(start)
+                tail = f.read(end - start) + tail
+                end = start
+                # The first line may be cut off unless the read reached the start of the file
+                lines = tail.split(b'\n')
+                tail = lines.pop(0) if start > 0 else b''
+                for line in reversed(lines):
+                    if not line.strip():
+                        continue
+                    try:
+                        point = json.loads(line)
+                    except ValueError:
+                        continue
+                    if after_tid is not None and point['transaction_id'] <= after_tid:
+                        return points[::-1]
+                    points.append(point)
+                    if after_tid is None:
+                        return points
+    except (OSError, KeyError):
+        pass
+    return points[::-1]
+
+_trade_log_cache = {"stamp": None, "trades": []}
+_trade_log_lock = threading.Lock()
+
+def load_hot_trades(log_path=TRADE_LOG_JSON):
+    # Parsed once per change of the hot log and shared by every push connection
+    try:
+        st = os.stat(log_path)
+        stamp = (st.st_mtime_ns, st.st_size)
+    except OSError:
+        stamp = None
+    with _trade_log_lock:
+        if stamp != _trade_log_cache["stamp"]:
+            _trade_log_cache["trades"] = load_trade_log(log_path).get('trades', [])
+            _trade_log_cache["stamp"] = stamp
+        return _trade_log_cache["trades"]
+
+class ValueSeriesWatcher:
+    """
+    Watches the value series file, which the trading agent appends to after each
+    committed transaction, and the intraday valuation series, and wakes up push
+    connections when either moves.
+    """
+    def __init__(self, values_path=PORTFOLIO_VALUES_JSONL, poll_seconds=WATCH_POLL_SECONDS):
+        self.values_path = values_path
+        self.poll_seconds = poll_seconds
+        self.cond = threading.Condition()
+        self.latest_tid = read_last_transaction_id(values_path)
+        self.latest_intraday = value_store.latest(VALUATION_SERIES)
+        self._stamp = None
+        self._thread = None
+
+    def start(self):
+        with self.cond:
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, daemon=True)
+                self._thread.start()
+
+    def _run(self):
+        while True:
+            try:
+                st = os.stat(self.values_path)
+                stamp = (st.st_mtime_ns, st.st_size)
+            except OSError:
+                stamp = None
+            intraday = value_store.latest(VALUATION_SERIES)
+            if stamp != self._stamp or intraday != self.latest_intraday:
+                self._stamp = stamp
+                tid = read_last_transaction_id(self.values_path)
+                with self.cond:
+                    self.latest_tid = tid
+                    self.latest_intraday = intraday
+                    self.cond.notify_all()
+            time.sleep(self.poll_seconds)
+
+    def intraday_ts(self):
+        return self.latest_intraday[0] if self.latest_intraday else 0
+
+    def wait_for_new(self, after_tid, after_ts, timeout):
+        with self.cond:
+            self.cond.wait_for(lambda: self.latest_tid > after_tid or self.intraday_ts() > after_ts, timeout)
+            return self.latest_tid, self.latest_intraday
+
+watcher = ValueSeriesWatcher()
 
 app = dash.Dash(__name__)
 app.title = "AI Trading Dashboard"
@@ -133,54 +282,15 @@ dark_card = '#393E46'
 light_text = '#EEEEEE'
 accent = '#00ADB5'
 
-app.layout = html.Div([
-    html.H1("AI Trading Dashboard", style={'color': accent}),
-    dcc.Interval(id='interval', interval=60*1000, n_intervals=0),  # update every minute
-    html.Div(id='portfolio-value-text', style={'fontSize': '2.5em', 'color': accent, 'marginBottom': '20px'}),
-    html.Div([
-        dcc.Graph(id='portfolio-value'),
-        dcc.Graph(id='allocation-pie'),
-    ], style={'display': 'flex', 'flexDirection': 'row'}),
-    html.A(
-        'View All Transactions (JSON)',
-        href='/transactions',
-        target='_blank',
-        style={
-            'display': 'inline-block',
-            'margin': '20px 0',
-            'padding': '10px 20px',
-            'backgroundColor': accent,
-            'color': dark_bg,
-            'borderRadius': '5px',
-            'textDecoration': 'none',
-            'fontWeight': 'bold',
-            'fontSize': '1.1em',
-        }
-    ),
-    html.H2("Latest Trades", style={'color': accent}),
-    html.Div(id='trades-table'),
-], style={'backgroundColor': dark_bg, 'minHeight': '100vh', 'padding': '20px'})
-
-# Remove buy-sell-table from callback and layout
-@app.server.route('/transactions')
-def serve_transactions():
-    log_data = load_trade_log()
-    from flask import jsonify
-    return Response(json.dumps(log_data, indent=2), mimetype='application/json')
-
-@app.callback(
-    [Output('portfolio-value', 'figure'),
-     Output('allocation-pie', 'figure'),
-     Output('trades-table', 'children'),
-     Output('portfolio-value-text', 'children')],
-    [Input('interval', 'n_intervals')]
-)
-def update_dashboard(n):
-    df = load_trades()
-    if df.empty:
-        return go.Figure(), go.Figure(), html.P("No trades found.", style={'color': light_text}), "Portfolio Value: $0.00 | Cash: $0.00"
+def serve_layout():
+    # Full render once per page load; after that the client only receives deltas
+    trades = load_trade_log().get('trades', [])
+    points = load_value_history()
+    latest_trades = get_latest_trades(trades)
+    cursor = points[-1]['transaction_id'] if points else 0
+    intraday = value_store.latest(VALUATION_SERIES)
     # Portfolio value line chart
-    value_fig = go.Figure([get_portfolio_value_trace(df)])
+    value_fig = go.Figure([get_portfolio_value_trace(points)])
     value_fig.update_layout(
         title="Portfolio Value Over Time",
         xaxis_title="Time",
@@ -192,42 +302,139 @@ def update_dashboard(n):
         xaxis=dict(color=light_text),
         yaxis=dict(color=light_text),
     )
-    # Allocation pie chart
-    pie_fig = go.Figure([get_allocation_pie_trace(df)])
-    pie_fig.update_layout(
-        title="Current Allocation",
+    intraday_start = time.time_ns() - int(INTRADAY_HISTORY_HOURS * 3600 * 1_000_000_000)
+    intraday_fig = go.Figure([get_intraday_trace(value_store.read_range(VALUATION_SERIES, start=intraday_start))])
+    intraday_fig.update_layout(
+        title="Intraday Value",
+        xaxis_title="Time (UTC)",
+        yaxis_title="Value ($)",
         plot_bgcolor=dark_card,
         paper_bgcolor=dark_bg,
         font_color=light_text,
         title_font_color=accent,
-        legend=dict(font=dict(color=light_text)),
+        xaxis=dict(color=light_text),
+        yaxis=dict(color=light_text),
     )
-    # Trades table
-    latest_tx = df[df['transaction_id'] == df['transaction_id'].max()]
-    trades_table = dash_table.DataTable(
-        columns=[
-            {"name": "Symbol", "id": "symbol"},
-            {"name": "Allocation (%)", "id": "allocation"},
-            {"name": "Current Price", "id": "current_price"},
-            {"name": "Amount", "id": "amount"},
-        ],
-        data=[{
-            "symbol": row['symbol'],
-            "allocation": f"{row['allocation']*100:.1f}",
-            "current_price": row['current_price'] if row['current_price'] is not None else 'N/A',
-            "amount": f"{row['amount']:.2f}"
-        } for _, row in latest_tx.iterrows()],
-        style_table={'overflowX': 'auto', 'backgroundColor': dark_card},
-        style_cell={'textAlign': 'center', 'backgroundColor': dark_card, 'color': light_text},
-        style_header={'fontWeight': 'bold', 'backgroundColor': accent, 'color': dark_bg},
+    # Price history for the current allocation
+    price_fig = go.Figure(get_price_history_traces([t['symbol'] for t in latest_trades]))
+    price_fig.update_layout(
+        title="Price History",
+        xaxis_title="Time",
+        yaxis_title="Price ($)",
+        plot_bgcolor=dark_card,
+        paper_bgcolor=dark_bg,
+        font_color=light_text,
+        title_font_color=accent,
+        xaxis=dict(color=light_text),
+        yaxis=dict(color=light_text),
+        legend=dict(font=dict(color=light_text)),
     )
-    # Portfolio value and cash as text
-    # Get the latest trade (by transaction_id and then by index)
-    latest_trade = df[df['transaction_id'] == df['transaction_id'].max()].iloc[-1]
-    portfolio_value = latest_trade.get('portfolio_value', 0)
-    cash = latest_trade.get('final_cash', 0)
-    value_text = f"Portfolio Value: ${portfolio_value:,.2f} | Cash: ${cash:,.2f}"
-    return value_fig, pie_fig, trades_table, value_text
+    return html.Div([
+        html.H1("AI Trading Dashboard", style={'color': accent}),
+        # Cursor is the last transaction rendered; push-delta receives server-sent updates
+        dcc.Store(id='cursor', data={'tid': cursor, 'ts': intraday[0] if intraday else 0}),
+        dcc.Store(id='push-delta'),
+        html.Div(get_value_text(latest_trades), id='portfolio-value-text', style={'fontSize': '2.5em', 'color': accent, 'marginBottom': '20px'}),
+        html.Div(get_intraday_text(intraday), id='intraday-value-text', style={'fontSize': '1.5em', 'color': light_text, 'marginBottom': '10px'}),
+        html.Div(get_analytics_text() if trades else "", id='analytics-text', style={'fontSize': '1.2em', 'color': light_text, 'marginBottom': '20px'}),
+        html.Div([
+            dcc.Graph(id='portfolio-value', figure=value_fig),
+            dcc.Graph(id='allocation-pie', figure=get_pie_figure(latest_trades)),
+        ], style={'display': 'flex', 'flexDirection': 'row'}),
+        dcc.Graph(id='intraday-value', figure=intraday_fig),
+        dcc.Graph(id='price-history', figure=price_fig),
+        html.A(
+            'View All Transactions (JSON)',
+            href='/transactions',
+            target='_blank',
+            style={
+                'display': 'inline-block',
+                'margin': '20px 0',
+                'padding': '10px 20px',
+                'backgroundColor': accent,
+                'color': dark_bg,
+                'borderRadius': '5px',
+                'textDecoration': 'none',
+                'fontWeight': 'bold',
+                'fontSize': '1.1em',
+            }
+        ),
+        html.H2("Latest Trades", style={'color': accent}),
+        dash_table.DataTable(
+            id='trades-table',
+            columns=TRADE_COLUMNS,
+            data=get_trade_rows(latest_trades),
+            style_table={'overflowX': 'auto', 'backgroundColor': dark_card},
+            style_cell={'textAlign': 'center', 'backgroundColor': dark_card, 'color': light_text},
+            style_header={'fontWeight': 'bold', 'backgroundColor': accent, 'color': dark_bg},
+        ),
+    ], style={'backgroundColor': dark_bg, 'minHeight': '100vh', 'padding': '20px'})
+
+app.layout = serve_layout
+
+# Remove buy-sell-table from callback and layout
+@app.server.route('/transactions')
+def serve_transactions():
+    # Hot window by default; ?start_tid=&end_tid=&start_date=&end_date= (YYYY-MM-DD) or ?all=1 reach the archive
+    args = request.args
+    if 'all' in args:
+        log_data = load_trade_log(include_archive=True)
+    elif any(k in args for k in ('start_tid', 'end_tid', 'start_date', 'end_date')):
+        trades = load_trade_range(args.get('start_tid', type=int), args.get('end_tid', type=int),
+                                  args.get('start_date'), args.get('end_date'))
+        log_data = {"trades": trades}
+    else:
+        log_data = load_trade_log()
+    from flask import jsonify
+    return Response(json.dumps(log_data, indent=2), mimetype='application/json')
+
+@app.server.route('/updates')
+def stream_updates():
+    # Server-sent events: one message per batch of new transactions or intraday
+    # revaluation, nothing while idle
+    cursor = request.args.get('after', default=0, type=int)
+    ts_cursor = request.args.get('after_ts', default=0, type=int)
+    watcher.start()
+    def events():
+        nonlocal cursor, ts_cursor
+        while True:
+            tid, intraday = watcher.wait_for_new(cursor, ts_cursor, KEEPALIVE_SECONDS)
+            delta = {}
+            if tid > cursor:
+                delta = build_delta(load_hot_trades(), read_value_points_after(cursor), cursor) or {}
+                cursor = delta.get('transaction_id', cursor)
+            if intraday is not None and intraday[0] > ts_cursor:
+                ts_cursor = intraday[0]
+                delta.update(build_intraday_delta(intraday))
+            if not delta:
+                yield ": keepalive\n\n"
+                continue
+            yield f"data: {json.dumps(delta)}\n\n"
+    return Response(stream_with_context(events()), mimetype='text/event-stream',
+                    headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'})
+
+# Both callbacks run in the browser (assets/push_updates.js): one opens the event
+# stream, the other applies each delta without a round trip to the server.
+app.clientside_callback(
+    ClientsideFunction(namespace='dashboard', function_name='subscribe'),
+    Output('push-delta', 'data'),
+    Input('cursor', 'data'),
+)
+
+app.clientside_callback(
+    ClientsideFunction(namespace='dashboard', function_name='applyDelta'),
+    [Output('portfolio-value', 'extendData'),
+     Output('intraday-value', 'extendData'),
+     Output('allocation-pie', 'figure'),
+     Output('trades-table', 'data'),
+     Output('portfolio-value-text', 'children'),
+     Output('analytics-text', 'children'),
+     Output('intraday-value-text', 'children')],
+    Input('push-delta', 'data'),
+    State('allocation-pie', 'figure'),
+    prevent_initial_call=True,
+)
 
 if __name__ == '__main__':
-    app.run(port=8050) 
\ No newline at end of file
+    configure_logging('dashboard')
+    app.run(port=8050, threaded=True)
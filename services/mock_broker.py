@@ -0,0 +1,144 @@
+import os
+import sys
+import time
+import random
+import logging
+import threading
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+from flask import Flask, request, jsonify
+from utils.log_config import configure_logging
+
+MOCK_BROKER_PORT = int(os.environ.get('MOCK_BROKER_PORT', 8070))
+# Per-request latency range in seconds
+MOCK_BROKER_LATENCY_MIN = float(os.environ.get('MOCK_BROKER_LATENCY_MIN', 0.05))
+MOCK_BROKER_LATENCY_MAX = float(os.environ.get('MOCK_BROKER_LATENCY_MAX', 0.3))
+# Delay between acceptance and (the last) fill
+MOCK_BROKER_FILL_DELAY = float(os.environ.get('MOCK_BROKER_FILL_DELAY', 0.5))
+# Share of orders that only ever fill part of their quantity
+MOCK_BROKER_PARTIAL_FILL_RATE = float(os.environ.get('MOCK_BROKER_PARTIAL_FILL_RATE', 0.2))
+# Fill prices are the reference price moved against the order by up to this fraction
+MOCK_BROKER_SLIPPAGE = float(os.environ.get('MOCK_BROKER_SLIPPAGE', 0.001))
+MOCK_BROKER_SEED = os.environ.get('MOCK_BROKER_SEED')
+
+
+class MockBroker:
+    """
+    In-memory broker with the HTTPBroker interface. Orders fill at their reference
+    price plus slippage: half the fillable quantity after half the fill delay, the
+    rest after the full delay. Partial-fill orders stop short and stay open until cancelled.
+    """
+    def __init__(self, latency=(MOCK_BROKER_LATENCY_MIN, MOCK_BROKER_LATENCY_MAX), fill_delay=MOCK_BROKER_FILL_DELAY,
+                 partial_fill_rate=MOCK_BROKER_PARTIAL_FILL_RATE, slippage=MOCK_BROKER_SLIPPAGE, seed=MOCK_BROKER_SEED):
+        self.latency = latency
+        self.fill_delay = fill_delay
+        self.partial_fill_rate = partial_fill_rate
+        self.slippage = slippage
+        self.random = random.Random(seed)
+        self.orders = {}
+        self.by_client_id = {}
+        self.lock = threading.Lock()
+        self._next_id = 0
+
+    def _sleep(self):
+        low, high = self.latency
+        if high > 0:
+            time.sleep(self.random.uniform(low, high))
+
+    def _report(self, order):
+        # Fills are derived from the order's age, so no background thread is needed
+        if order['status'] in ('accepted', 'partially_filled'):
+            age = time.monotonic() - order['created']
+            step = 1.0 if age >= order['fill_delay'] else 0.5 if age >= order['fill_delay'] / 2 else 0.0
+            order['filled_qty'] = order['quantity'] * order['fill_ratio'] * step
+            if order['filled_qty']:
+                order['status'] = 'filled' if order['filled_qty'] >= order['quantity'] else 'partially_filled'
+        return {k: order[k] for k in ('order_id', 'client_order_id', 'symbol', 'side', 'quantity', 'status',
+                                      'filled_qty', 'avg_price', 'error')}
+
+    def submit_order(self, symbol, side, quantity, price=None, client_order_id=None):
+        self._sleep()
+        with self.lock:
+            # Resubmitting the same client order id returns the original order
+            if client_order_id and client_order_id in self.by_client_id:
+                return self._report(self.orders[self.by_client_id[client_order_id]])
+            self._next_id += 1
+            order_id = f"M{self._next_id:06d}"
+            error = None
+            if side not in ('buy', 'sell'):
+                error = f"invalid side {side!r}"
+            elif not quantity or quantity <= 0:
+                error = "quantity must be positive"
+            elif not price or price <= 0:
+                error = "no reference price"
+            partial = self.random.random() < self.partial_fill_rate
+            direction = 1 if side == 'buy' else -1
+            order = {
+                "order_id": order_id,
+                "client_order_id": client_order_id,
+                "symbol": symbol,
+                "side": side,
+                "quantity": quantity,
+                "status": 'rejected' if error else 'accepted',
+                "filled_qty": 0.0,
+                "avg_price": price * (1 + direction * self.random.uniform(0, self.slippage)) if not error else None,
+                "error": error,
+                "created": time.monotonic(),
+                "fill_delay": self.fill_delay,
+                "fill_ratio": self.random.uniform(0.3, 0.9) if partial else 1.0,
+            }
+            self.orders[order_id] = order
+            if client_order_id:
+                self.by_client_id[client_order_id] = order_id
+            logging.info(f"Order {order_id}: {side} {quantity:.4f} {symbol} ({order['status']})")
+            return self._report(order)
+
+    def get_order(self, order_id):
+        self._sleep()
+        with self.lock:
+            return self._report(self.orders[order_id])
+
+    def cancel_order(self, order_id):
+        self._sleep()
+        with self.lock:
+            order = self.orders[order_id]
+            report = self._report(order)
+            if order['status'] in ('accepted', 'partially_filled'):
+                order['status'] = 'cancelled'
+                report['status'] = 'cancelled'
+            return report
+
+
+app = Flask(__name__)
+broker = MockBroker()
+
+
+@app.route('/orders', methods=['POST'])
+def submit_order():
+    data = request.get_json() or {}
+    try:
+        quantity = float(data.get('quantity') or 0)
+        price = float(data['price']) if data.get('price') is not None else None
+    except (TypeError, ValueError):
+        return jsonify({"error": "quantity and price must be numbers"}), 400
+    report = broker.submit_order(data.get('symbol', ''), data.get('side', ''), quantity, price=price,
+                                 client_order_id=data.get('client_order_id'))
+    return jsonify(report), 200
+
+
+@app.route('/orders/<order_id>', methods=['GET'])
+def get_order(order_id):
+    if order_id not in broker.orders:
+        return jsonify({"error": "unknown order"}), 404
+    return jsonify(broker.get_order(order_id)), 200
+
+
+@app.route('/orders/<order_id>', methods=['DELETE'])
+def cancel_order(order_id):
+    if order_id not in broker.orders:
+        return jsonify({"error": "unknown order"}), 404
+    return jsonify(broker.cancel_order(order_id)), 200
+
+
+if __name__ == '__main__':
+    configure_logging('mock_broker')
+    app.run(port=MOCK_BROKER_PORT, threaded=True)
@@ -0,0 +1,136 @@
+import os
+import sys
+import time
+import logging
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+from utils.trade_log_utils import load_trade_log, TRADE_LOG_JSON
+from utils.price_store import PriceStore
+from utils.quote_cache import get_quote_cache
+from utils.circuit_breaker import CircuitBreaker, CircuitOpenError
+from utils.portfolio_analytics import VALUATION_STORE_DIR, VALUATION_SERIES
+from utils.log_config import configure_logging
+
+# Revalue every N seconds between rebalances
+VALUATION_INTERVAL_SECONDS = float(os.environ.get('VALUATION_INTERVAL_SECONDS', 15))
+# Network budget: at most this many symbols are quoted per cycle, in one batched request.
+# Larger portfolios are covered round-robin over several cycles.
+VALUATION_MAX_SYMBOLS = int(os.environ.get('VALUATION_MAX_SYMBOLS', 50))
+
+
+def fetch_quotes(symbols):
+    """Fetch the latest price for many symbols with a single batched yfinance request."""
+    import yfinance as yf
+    data = yf.download(list(symbols), period='1d', interval='1m', progress=False, threads=False)
+    if data is None or data.empty:
+        return {}
+    closes = data['Close'].ffill().iloc[-1]
+    return {symbol: float(price) for symbol, price in closes.items() if price == price}
+
+
+def get_last_positions(trades):
+    """Holdings, cash and last traded prices as of the latest transaction."""
+    if not trades:
+        return {}, 0.0, {}
+    last_tid = trades[-1]['transaction_id']
+    last_trades = [t for t in trades if t['transaction_id'] == last_tid]
+    holdings = {t['symbol']: t.get('shares_held', 0) for t in last_trades if t.get('shares_held', 0)}
+    prices = {t['symbol']: t['current_price'] for t in last_trades if t.get('current_price')}
+    cash = last_trades[-1].get('final_cash', last_trades[-1].get('cash', 0.0))
+    return holdings, cash, prices
+
+
+class ValuationService:
+    """
+    Revalues the latest holdings on a short cadence. The value is maintained
+    incrementally: only symbols whose quote moved touch it, and a snapshot is
+    written only when it changed.
+    """
+    def __init__(self, interval_seconds=VALUATION_INTERVAL_SECONDS, max_symbols=VALUATION_MAX_SYMBOLS,
+                 fetch_quotes=fetch_quotes, price_store=None, value_store=None, log_path=TRADE_LOG_JSON,
+                 quote_cache=None, breaker=None):
+        self.interval_seconds = interval_seconds
+        self.max_symbols = max_symbols
+        self.fetch_quotes = fetch_quotes
+        self.price_store = price_store or PriceStore()
+        self.value_store = value_store or PriceStore(VALUATION_STORE_DIR)
+        # Every fetched quote is published here for the other services to read
+        self.quote_cache = quote_cache or get_quote_cache()
+        # Skips fetching while yfinance keeps failing; the last value simply stands
+        self.breaker = breaker or CircuitBreaker.from_env('yfinance', min_calls=3)
+        self.log_path = log_path
+        self.holdings = {}
+        self.cash = 0.0
+        self.prices = {}
+        self.value = None
+        self._log_stamp = None
+        self._cursor = 0
+
+    def refresh_positions(self):
+        """Reload holdings only when the trade log has changed. Returns True if it did."""
+        try:
+            st = os.stat(self.log_path)
+            stamp = (st.st_mtime_ns, st.st_size)
+        except OSError:
+            stamp = None
+        if stamp == self._log_stamp:
+            return False
+        self._log_stamp = stamp
+        self.holdings, self.cash, traded_prices = get_last_positions(load_trade_log(self.log_path)["trades"])
+        for symbol, price in traded_prices.items():
+            self.prices.setdefault(symbol, price)
+        self.value = self.cash + sum(shares * self.prices.get(symbol, 0) for symbol, shares in self.holdings.items())
+        return True
+
+    def next_batch(self):
+        symbols = sorted(self.holdings)
+        if len(symbols) <= self.max_symbols:
+            return symbols
+        start = self._cursor % len(symbols)
+        batch = (symbols[start:] + symbols[:start])[:self.max_symbols]
+        self._cursor = start + self.max_symbols
+        return batch
+
+    def run_once(self):
+        """Quote one batch and fold price moves into the value. Returns the symbols that changed."""
+        positions_changed = self.refresh_positions()
+        batch = self.next_batch()
+        quotes = {}
+        if batch:
+            try:
+                quotes = self.breaker.call(self.fetch_quotes, batch)
+            except CircuitOpenError:
+                pass
+            except Exception as e:
+                logging.warning(f"Quote fetch failed for {len(batch)} symbols: {e}")
+        now = time.time_ns()
+        if quotes:
+            self.quote_cache.put_many(quotes, now)
+        changed = []
+        for symbol, price in quotes.items():
+            if symbol not in self.holdings or not price or price == self.prices.get(symbol):
+                continue
+            self.value += self.holdings[symbol] * (price - self.prices.get(symbol, 0))
+            self.prices[symbol] = price
+            self.price_store.append(symbol, now, price)
+            changed.append(symbol)
+        if self.value is not None and (changed or positions_changed):
+            self.value_store.append(VALUATION_SERIES, now, self.value)
+            logging.info(f"Portfolio value ${self.value:,.2f} ({len(changed)} of {len(batch)} quotes moved)")
+        return changed
+
+    def run(self):
+        logging.info("Starting valuation service loop.")
+        try:
+            while True:
+                started = time.monotonic()
+                self.run_once()
+                # Fixed cadence, with at least half an interval idle even if a cycle runs long
+                elapsed = time.monotonic() - started
+                time.sleep(max(self.interval_seconds - elapsed, self.interval_seconds / 2))
+        except KeyboardInterrupt:
+            logging.info("Valuation service loop stopped by user.")
+
+
+if __name__ == '__main__':
+    configure_logging('valuation_service')
+    ValuationService().run()
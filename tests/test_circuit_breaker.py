@@ -0,0 +1,150 @@
+import unittest
+from unittest.mock import patch, MagicMock
+import os
+import sys
+import time
+import tempfile
+import requests
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+from utils.circuit_breaker import CircuitBreaker, CircuitOpenError, StaleCache, CLOSED, OPEN, HALF_OPEN
+from utils.mcp_client import MCPClient
+import utils.mcp_server as mcp_server
+
+def fail():
+    raise RuntimeError("down")
+
+class TestCircuitBreaker(unittest.TestCase):
+    def test_opens_on_error_rate_and_fails_fast(self):
+        breaker = CircuitBreaker('test', min_calls=4, error_rate=0.5, open_seconds=60)
+        breaker.call(lambda: 1)
+        breaker.call(lambda: 1)
+        for _ in range(2):
+            with self.assertRaises(RuntimeError):
+                breaker.call(fail)
+        self.assertEqual(breaker.state, OPEN)
+        called = []
+        with self.assertRaises(CircuitOpenError):
+            breaker.call(called.append, 1)
+        self.assertEqual(called, [])
+
+    def test_half_open_probe_closes_or_reopens(self):
+        breaker = CircuitBreaker('test', min_calls=1, open_seconds=0.05)
+        with self.assertRaises(RuntimeError):
+            breaker.call(fail)
+        time.sleep(0.06)
+        with self.assertRaises(RuntimeError):
+            breaker.call(fail)
+        self.assertEqual(breaker.state, OPEN)
+        time.sleep(0.06)
+        # Only one probe at a time while half-open
+        self.assertTrue(breaker.allow())
+        self.assertEqual(breaker.state, HALF_OPEN)
+        self.assertFalse(breaker.allow())
+        breaker.record(True, 0.01)
+        self.assertEqual(breaker.state, CLOSED)
+
+    def test_mcp_client_probes_admit_concurrent_slots(self):
+        client = MCPClient('http://fake-url')
+        breaker = client.llm_breaker
+        breaker._open()
+        breaker.opened_at -= breaker.open_seconds
+        # Concurrent ensemble slots and hedges are not turned away while half-open
+        self.assertTrue(all(breaker.allow() for _ in range(8)))
+
+    def test_slow_calls_count_as_failures(self):
+        breaker = CircuitBreaker('test', min_calls=2, latency_threshold=0.5)
+        breaker.record(True, 1.0)
+        breaker.record(True, 2.0)
+        self.assertEqual(breaker.state, OPEN)
+
+    def test_from_env_overrides(self):
+        with patch.dict(os.environ, {'DEMO_CIRCUIT_OPEN_SECONDS': '5', 'DEMO_CIRCUIT_MIN_CALLS': '2'}):
+            breaker = CircuitBreaker.from_env('demo', open_seconds=30)
+        self.assertEqual((breaker.open_seconds, breaker.min_calls), (5.0, 2))
+
+    def test_stale_cache_bound(self):
+        cache = StaleCache(max_age_seconds=60)
+        cache.put('k', 1)
+        self.assertEqual(cache.get('k')[0], 1)
+        cache.values['k'] = (1, time.time() - 61)
+        self.assertIsNone(cache.get('k'))
+
+class TestIntegrations(unittest.TestCase):
+    @patch('utils.mcp_client.requests.post')
+    def test_mcp_client_skips_requests_while_open(self, mock_post):
+        mock_post.side_effect = requests.ConnectionError('connection refused')
+        client = MCPClient('http://fake-url', llm_breaker=CircuitBreaker('mcp_llm', min_calls=2, open_seconds=60))
+        for _ in range(5):
+            self.assertEqual(client.send('PROMPT'), '')
+        self.assertEqual(mock_post.call_count, 2)
+
+    @patch('utils.mcp_client.requests.post')
+    def test_llm_failures_do_not_block_bookkeeping(self, mock_post):
+        client = MCPClient('http://fake-url')
+        # LLM prompts timing out open only the LLM breaker
+        mock_post.side_effect = requests.Timeout('read timed out')
+        for _ in range(10):
+            client.send('PROMPT')
+        self.assertEqual(client.llm_breaker.state, OPEN)
+        mock_post.side_effect = None
+        mock_post.return_value = MagicMock(**{'json.return_value': {'result': 'trades recorded (json)'}})
+        self.assertEqual(client.record_trades([]), 'trades recorded (json)')
+        self.assertEqual(client.breaker.state, CLOSED)
+
+    @patch('utils.mcp_client.requests.post')
+    def test_slow_replies_and_http_errors_count_as_reachable(self, mock_post):
+        breaker = CircuitBreaker('mcp_llm', min_calls=1)
+        client = MCPClient('http://fake-url', llm_breaker=breaker)
+        mock_post.return_value = MagicMock(**{'raise_for_status.side_effect': requests.HTTPError('500')})
+        for _ in range(3):
+            self.assertEqual(client.send('PROMPT'), '')
+        self.assertEqual(breaker.state, CLOSED)
+
+    @patch('utils.mcp_client.requests.post')
+    def test_mcp_client_reports_stale_replies(self, mock_post):
+        mock_post.return_value = MagicMock(**{'json.return_value': {'result': '{"A": 1}', 'stale': True}})
+        client = MCPClient('http://fake-url')
+        self.assertEqual(client.send('PROMPT'), '{"A": 1}')
+        self.assertTrue(client.last_stale)
+
+    @patch('utils.mcp_server.requests.post')
+    def test_mcp_server_serves_last_good_reply_when_ollama_is_down(self, mock_post):
+        client = mcp_server.app.test_client()
+        with patch.object(mcp_server, 'ollama_breaker', CircuitBreaker('ollama', min_calls=1, open_seconds=60)), \
+                patch.object(mcp_server, 'ollama_results', StaleCache(60)):
+            mock_post.return_value = MagicMock(text='{"response": "{\\"AAPL\\": 1.0}"}')
+            self.assertEqual(client.post('/mcp', json={'prompt': 'pick'}).get_json(), {'result': '{"AAPL": 1.0}'})
+            mock_post.side_effect = Exception('timeout')
+            reply = client.post('/mcp', json={'prompt': 'pick'}).get_json()
+            self.assertEqual((reply['result'], reply['stale']), ('{"AAPL": 1.0}', True))
+            # Breaker is now open: Ollama is not called again
+            client.post('/mcp', json={'prompt': 'pick'})
+            self.assertEqual(mock_post.call_count, 2)
+            self.assertEqual(client.post('/mcp', json={'prompt': 'other'}).status_code, 500)
+
+    @patch('agents.trading_agent.MCPClient')
+    def test_agent_reuses_last_allocation_and_marks_it_stale(self, MockMCPClient):
+        from agents.trading_agent import SmartM1TradingAgent
+        from utils.price_store import PriceStore
+        from utils.quote_cache import QuoteCache
+        mock_mcp = MockMCPClient.return_value
+        mock_mcp.last_stale = False
+        mock_mcp.send.return_value = '{"AAPL": 1.0}'
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        quote_cache = QuoteCache(os.path.join(tmp.name, 'quotes.bin'), slots=8)
+        self.addCleanup(quote_cache.close)
+        agent = SmartM1TradingAgent(api_key='dummy', log_path=os.path.join(tmp.name, 'trade_log.json'),
+                                    price_store=PriceStore(os.path.join(tmp.name, 'prices')), quote_cache=quote_cache)
+        agent.generate_portfolio_with_llm()
+        self.assertFalse(agent.portfolio_stale)
+        mock_mcp.send.return_value = ''
+        agent.generate_portfolio_with_llm()
+        self.assertEqual(agent.portfolio, {"AAPL": 1.0})
+        self.assertTrue(agent.portfolio_stale)
+        agent.stale_prices = {"AAPL"}
+        self.assertEqual(agent._mark_stale({"symbol": "AAPL"}),
+                         {"symbol": "AAPL", "price_stale": True, "allocation_stale": True})
+
+if __name__ == '__main__':
+    unittest.main()
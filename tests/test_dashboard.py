@@ -0,0 +1,67 @@
+import unittest
+import os
+import sys
+import tempfile
+from unittest.mock import patch
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+from services.dashboard import (build_delta, build_intraday_delta, read_last_transaction_id, read_value_points_after,
+                                TRADE_COLUMNS)
+from utils.quote_cache import QuoteCache
+
+def make_trade(tid, symbol, allocation):
+    return {
+        "transaction_id": f"{tid:05d}",
+        "time": "12:00:00",
+        "date": "01-06-24",
+        "symbol": symbol,
+        "current_price": 100.0,
+        "amount": 100.0,
+        "allocation": allocation,
+        "portfolio_value": 1000.0,
+        "final_cash": 0.0,
+    }
+
+class TestDashboardDelta(unittest.TestCase):
+    def test_delta_contains_only_new_points(self):
+        trades = [make_trade(1, "AAPL", 1.0), make_trade(2, "AAPL", 0.5), make_trade(2, "MSFT", 0.5)]
+        points = [
+            {"transaction_id": 1, "datetime": "01-06-24 12:00:00", "value": 1000.0},
+            {"transaction_id": 2, "datetime": "01-06-24 12:02:00", "value": 1010.0},
+        ]
+        with tempfile.TemporaryDirectory() as tmp:
+            quote_cache = QuoteCache(os.path.join(tmp, 'quotes.bin'), slots=8)
+            quote_cache.put("AAPL", 101.0)
+            with patch('services.dashboard.get_quote_cache', return_value=quote_cache):
+                delta = build_delta(trades, points, after_tid=1)
+                self.assertIsNone(build_delta(trades, points, after_tid=2))
+            quote_cache.close()
+        self.assertEqual(delta['transaction_id'], 2)
+        self.assertEqual(delta['y'], [1010.0])
+        self.assertEqual([(row['symbol'], row['last_quote']) for row in delta['rows']],
+                         [("AAPL", "101.00"), ("MSFT", "N/A")])
+        # Every field sent to the table has a rendered column
+        self.assertEqual(set(delta['rows'][0]), {column['id'] for column in TRADE_COLUMNS})
+        self.assertEqual(delta['pie'], {"labels": ["AAPL", "MSFT"], "values": [0.5, 0.5]})
+
+    def test_intraday_delta_appends_a_point(self):
+        ts = 1_700_000_000 * 1_000_000_000
+        delta = build_intraday_delta((ts, 1234.5))
+        self.assertEqual((delta['intraday_ts'], delta['intraday_x'], delta['intraday_y']),
+                         (ts, "2023-11-14T22:13:20.000", 1234.5))
+        self.assertIn("$1,234.50", delta['intraday_text'])
+
+    def test_read_last_transaction_id_reads_tail(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, 'values.jsonl')
+            self.assertEqual(read_last_transaction_id(path), 0)
+            with open(path, 'w') as f:
+                for tid in range(1, 500):
+                    f.write(f'{{"transaction_id": {tid}, "datetime": "", "value": 1.0}}\n')
+            self.assertEqual(read_last_transaction_id(path), 499)
+            self.assertEqual([p['transaction_id'] for p in read_value_points_after(495, path, block_size=64)],
+                             [496, 497, 498, 499])
+            self.assertEqual(len(read_value_points_after(0, path, block_size=100)), 499)
+            self.assertEqual(read_value_points_after(499, path), [])
+
+if __name__ == '__main__':
+    unittest.main()
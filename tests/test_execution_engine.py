@@ -0,0 +1,91 @@
+import unittest
+import os
+import sys
+import time
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+from utils.execution_engine import ExecutionEngine, plan_orders, apply_fills, target_holdings
+from services.mock_broker import MockBroker, app
+
+def fast_engine(broker, **kwargs):
+    options = dict(poll_interval=0.01, order_timeout=1.0, rate_limit=0)
+    options.update(kwargs)
+    return ExecutionEngine(broker, **options)
+
+class TestPlanOrders(unittest.TestCase):
+    def test_nets_deltas_and_sends_sells_first(self):
+        holdings = {"AAPL": 5.0, "MSFT": 2.0, "TSLA": 1.0}
+        targets = {"AAPL": 2.0, "MSFT": 2.00001, "NVDA": 3.0}
+        orders = plan_orders(holdings, targets, {"AAPL": 100.0, "TSLA": 200.0, "NVDA": 50.0})
+        self.assertEqual([(o.side, o.symbol, o.quantity) for o in orders],
+                         [("sell", "AAPL", 3.0), ("sell", "TSLA", 1.0), ("buy", "NVDA", 3.0)])
+
+    def test_target_holdings_skips_unpriced(self):
+        self.assertEqual(target_holdings({"AAPL": 0.5, "X": 0.5}, {"AAPL": 50.0, "X": None}, 1000), {"AAPL": 10.0})
+
+class TestExecutionEngine(unittest.TestCase):
+    def test_orders_fill_concurrently(self):
+        broker = MockBroker(latency=(0.05, 0.05), fill_delay=0.05, partial_fill_rate=0, slippage=0, seed=1)
+        orders = plan_orders({}, {f"S{i}": 1.0 for i in range(10)}, {f"S{i}": 10.0 for i in range(10)})
+        started = time.monotonic()
+        sent = fast_engine(broker, max_concurrency=10).execute(orders)
+        # Ten orders, each with several 50ms broker round trips, finish in well under the serial time
+        self.assertLess(time.monotonic() - started, 1.0)
+        self.assertTrue(all(o.status == 'filled' and o.filled_qty == 1.0 for o in sent))
+
+    def test_partial_fill_is_cancelled_at_timeout(self):
+        broker = MockBroker(latency=(0, 0), fill_delay=0.02, partial_fill_rate=1.0, slippage=0, seed=1)
+        order, = fast_engine(broker, order_timeout=0.2).execute(plan_orders({}, {"AAPL": 10.0}, {"AAPL": 100.0}))
+        self.assertEqual(order.status, 'cancelled')
+        self.assertTrue(0 < order.filled_qty < 10.0)
+        holdings, cash = apply_fills([order], {}, 5000.0)
+        self.assertAlmostEqual(holdings["AAPL"], order.filled_qty)
+        self.assertAlmostEqual(cash, 5000.0 - order.filled_qty * 100.0)
+
+    def test_batch_shares_one_deadline(self):
+        broker = MockBroker(latency=(0, 0), fill_delay=0.02, partial_fill_rate=1.0, slippage=0, seed=1)
+        orders = plan_orders({}, {f"S{i}": 1.0 for i in range(20)}, {f"S{i}": 10.0 for i in range(20)})
+        started = time.monotonic()
+        sent = fast_engine(broker, max_concurrency=2, order_timeout=0.3).execute(orders)
+        # Partial fills hold their slot until the deadline, yet the batch is not 10 x 0.3s
+        self.assertLess(time.monotonic() - started, 0.8)
+        self.assertEqual({o.status for o in sent}, {'cancelled', 'expired'})
+
+    def test_partial_sell_leaves_time_for_buys(self):
+        broker = MockBroker(latency=(0, 0), fill_delay=0.02, partial_fill_rate=1.0, slippage=0, seed=1)
+        orders = plan_orders({"OLD": 10.0}, {"NEW": 5.0}, {"OLD": 10.0, "NEW": 10.0})
+        sell, buy = fast_engine(broker, order_timeout=0.4).execute(orders, cash=0.0)
+        # The sell is cut off at its share of the deadline; the buy is still sent with the proceeds
+        self.assertEqual((sell.status, buy.status), ('cancelled', 'cancelled'))
+        self.assertTrue(0 < sell.filled_qty < 10.0)
+        self.assertGreater(buy.filled_qty, 0)
+
+    def test_buys_scaled_to_cash_after_sells(self):
+        broker = MockBroker(latency=(0, 0), fill_delay=0, partial_fill_rate=0, slippage=0, seed=1)
+        orders = plan_orders({"AAPL": 1.0}, {"MSFT": 4.0}, {"AAPL": 100.0, "MSFT": 100.0})
+        sell, buy = fast_engine(broker).execute(orders, cash=100.0)
+        self.assertEqual((sell.side, sell.status), ('sell', 'filled'))
+        # $100 cash plus $100 from the sale buys 2 of the 4 shares wanted
+        self.assertAlmostEqual(buy.filled_qty, 2.0)
+
+    def test_rejected_without_price(self):
+        broker = MockBroker(latency=(0, 0), fill_delay=0, seed=1)
+        order, = fast_engine(broker).execute(plan_orders({"XYZ": 3.0}, {}))
+        self.assertEqual((order.status, order.filled_qty), ('rejected', 0.0))
+
+class TestMockBrokerAPI(unittest.TestCase):
+    def test_submit_poll_cancel(self):
+        client = app.test_client()
+        response = client.post('/orders', json={"symbol": "AAPL", "side": "buy", "quantity": 2, "price": 10,
+                                                "client_order_id": "t-1"})
+        self.assertEqual(response.status_code, 200)
+        order_id = response.get_json()["order_id"]
+        # Same client order id returns the same order
+        again = client.post('/orders', json={"symbol": "AAPL", "side": "buy", "quantity": 2, "price": 10,
+                                             "client_order_id": "t-1"})
+        self.assertEqual(again.get_json()["order_id"], order_id)
+        self.assertEqual(client.get(f'/orders/{order_id}').status_code, 200)
+        self.assertIn(client.delete(f'/orders/{order_id}').get_json()["status"], ('cancelled', 'filled'))
+        self.assertEqual(client.get('/orders/nope').status_code, 404)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,55 @@
+import unittest
+import os
+import sys
+import time
+import threading
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+from utils.llm_ensemble import EnsembleQuery, LatencyTracker, combine_allocations, parse_allocation
+
+class TestCombineAllocations(unittest.TestCase):
+    def test_parse_allocation(self):
+        self.assertEqual(parse_allocation('Sure: {"AAPL": 0.6, "MSFT": 0.4}'), {"AAPL": 0.6, "MSFT": 0.4})
+        self.assertIsNone(parse_allocation('llm error'))
+        self.assertIsNone(parse_allocation('{"AAPL": "lots"}'))
+
+    def test_rules(self):
+        allocations = [{"AAPL": 0.5, "TSLA": 0.5}, {"AAPL": 0.6, "MSFT": 0.4}, {"AAPL": 0.7, "TSLA": 0.3}]
+        self.assertEqual(combine_allocations(allocations, 'first_valid'), allocations[0])
+        median = combine_allocations(allocations, 'median')
+        self.assertAlmostEqual(median["AAPL"], 0.6 / 0.9)
+        self.assertNotIn("MSFT", median)
+        vote = combine_allocations(allocations, 'vote')
+        self.assertEqual(set(vote), {"AAPL", "TSLA"})
+        self.assertAlmostEqual(sum(vote.values()), 1.0)
+
+class TestEnsembleQuery(unittest.TestCase):
+    def test_slow_request_is_hedged(self):
+        calls = []
+        lock = threading.Lock()
+        def send(prompt, model, options, timeout):
+            with lock:
+                calls.append(model)
+                first = calls.count(model) == 1
+            if model == 'slow' and first:
+                time.sleep(2)
+            return '{"AAPL": 1.0}'
+        ensemble = EnsembleQuery(send, ['slow'], rule='first_valid', deadline=5,
+                                 latencies=LatencyTracker(default=0.05))
+        started = time.monotonic()
+        self.assertEqual(ensemble.run('prompt'), {"AAPL": 1.0})
+        self.assertLess(time.monotonic() - started, 1)
+        self.assertEqual(calls, ['slow', 'slow'])
+
+    def test_deadline_bounds_wall_clock(self):
+        def send(prompt, model, options, timeout):
+            if model == 'stuck':
+                time.sleep(2)
+            return '{"AAPL": 0.5, "MSFT": 0.5}' if model == 'good' else 'llm error'
+        ensemble = EnsembleQuery(send, ['good', 'stuck', 'bad'], rule='median', deadline=0.3,
+                                 latencies=LatencyTracker(default=10))
+        started = time.monotonic()
+        self.assertEqual(ensemble.run('prompt'), {"AAPL": 0.5, "MSFT": 0.5})
+        self.assertLess(time.monotonic() - started, 1)
+
+if __name__ == '__main__':
+    unittest.main()
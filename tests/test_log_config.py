@@ -0,0 +1,47 @@
+import unittest
+import os
+import sys
+import json
+import logging
+import tempfile
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+from utils.log_config import configure_logging, summarize_prompt
+
+class TestLogConfig(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        root = logging.getLogger()
+        self.saved = (root.level, list(root.handlers))
+
+    def tearDown(self):
+        root = logging.getLogger()
+        for handler in list(root.handlers):
+            root.removeHandler(handler)
+        root.setLevel(self.saved[0])
+        for handler in self.saved[1]:
+            root.addHandler(handler)
+        self.tmp.cleanup()
+
+    def test_json_lines_with_truncated_payload(self):
+        os.environ['TESTSVC_LOG_MAX_PAYLOAD'] = '20'
+        try:
+            listener = configure_logging('testsvc', level=logging.INFO, log_dir=self.tmp.name, console=False)
+        finally:
+            del os.environ['TESTSVC_LOG_MAX_PAYLOAD']
+        logging.debug("dropped")
+        logging.info("x" * 100)
+        listener.stop()
+        with open(os.path.join(self.tmp.name, 'testsvc.jsonl')) as f:
+            records = [json.loads(line) for line in f]
+        self.assertEqual(len(records), 1)
+        self.assertEqual(records[0]["service"], "testsvc")
+        self.assertEqual(records[0]["msg"], "x" * 20 + "... [truncated 80 chars]")
+
+    def test_record_trades_prompt_is_summarized(self):
+        trades = [{"transaction_id": "00007", "symbol": "AAPL"}, {"transaction_id": "00008", "symbol": "MSFT"}]
+        payload = json.dumps(trades)
+        summary = summarize_prompt(f"RECORD_TRADES: {payload}")
+        self.assertEqual(summary, f"RECORD_TRADES: 2 trades, last transaction_id 00008, {len(payload) + 1} bytes")
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,79 @@
+import unittest
+import os
+import sys
+import numpy as np
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+from utils.portfolio_analytics import PortfolioAnalytics, SECONDS_PER_YEAR
+from utils.price_store import PRICE_DTYPE
+
+def make_trade(tid, symbol, action, shares_changed, shares_held, price, cash, time="12:00:00"):
+    return {
+        "transaction_id": f"{tid:05d}",
+        "time": time,
+        "date": "01-06-24",
+        "symbol": symbol,
+        "action": action,
+        "shares_changed": shares_changed,
+        "shares_held": shares_held,
+        "current_price": price,
+        "amount": abs(shares_changed) * price,
+        "allocation": 0,
+        "cash": cash,
+        "final_cash": cash,
+    }
+
+class TestPortfolioAnalytics(unittest.TestCase):
+    def test_realized_and_unrealized_pnl(self):
+        analytics = PortfolioAnalytics()
+        analytics.update([make_trade(1, "AAPL", "Buy", 10, 10, 100, 0)])
+        analytics.update([make_trade(2, "AAPL", "Sell", -4, 6, 110, 440)])
+        snapshot = analytics.snapshot()
+        self.assertAlmostEqual(snapshot['realized_pnl'], 40)
+        self.assertAlmostEqual(snapshot['unrealized_pnl'], 60)
+        self.assertAlmostEqual(snapshot['portfolio_value'], 1100)
+        self.assertAlmostEqual(snapshot['turnover'], 1440)
+
+    def test_drawdown_and_replay_is_idempotent(self):
+        analytics = PortfolioAnalytics()
+        analytics.update([make_trade(1, "AAPL", "Buy", 10, 10, 100, 0)])
+        analytics.update([make_trade(2, "AAPL", "Hold", 0, 10, 80, 0)])
+        self.assertFalse(analytics.update([make_trade(2, "AAPL", "Hold", 0, 10, 50, 0)]))
+        analytics.update([make_trade(3, "AAPL", "Hold", 0, 10, 90, 0)])
+        snapshot = analytics.snapshot()
+        self.assertAlmostEqual(snapshot['max_drawdown'], 0.2)
+        self.assertAlmostEqual(snapshot['drawdown'], 0.1)
+        self.assertEqual(snapshot['observations'], 2)
+
+    def test_state_round_trip(self):
+        analytics = PortfolioAnalytics()
+        analytics.update([make_trade(1, "AAPL", "Buy", 10, 10, 100, 0)])
+        analytics.update([make_trade(2, "AAPL", "Hold", 0, 10, 120, 0)])
+        restored = PortfolioAnalytics.from_dict(analytics.to_dict())
+        self.assertEqual(restored.snapshot(), analytics.snapshot())
+
+    def test_sharpe_is_annualized_by_transaction_spacing(self):
+        analytics = PortfolioAnalytics(periods_per_year=None)
+        for tid, price in enumerate((100, 101, 100, 102), start=1):
+            analytics.update([make_trade(tid, "AAPL", "Hold", 0, 1, price, 0, time=f"12:{2 * tid:02d}:00")])
+        # One transaction every 2 minutes
+        self.assertAlmostEqual(analytics.annualization(), SECONDS_PER_YEAR / 120)
+        daily = PortfolioAnalytics.from_dict(analytics.to_dict())
+        self.assertEqual(daily.snapshot(), analytics.snapshot())
+        daily.periods_per_year = 252
+        self.assertAlmostEqual(analytics.sharpe() / daily.sharpe(), (SECONDS_PER_YEAR / 120 / 252) ** 0.5)
+
+    def test_intraday_snapshots_feed_drawdown(self):
+        analytics = PortfolioAnalytics()
+        analytics.update([make_trade(1, "AAPL", "Buy", 10, 10, 100, 0)])
+        records = np.array([(10, 1200.0), (20, 900.0), (30, 1000.0)], dtype=PRICE_DTYPE)
+        self.assertEqual(analytics.fold_intraday(records, until_ns=20), 2)
+        self.assertAlmostEqual(analytics.max_drawdown, 0.25)
+        # Already folded snapshots are skipped; the rest are picked up later
+        self.assertEqual(analytics.fold_intraday(records), 1)
+        self.assertEqual(analytics.fold_intraday(records), 0)
+        self.assertEqual((analytics.peak_value, analytics.intraday_ts), (1200.0, 30))
+        restored = PortfolioAnalytics.from_dict(analytics.to_dict())
+        self.assertEqual(restored.intraday_ts, 30)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,89 @@
+import unittest
+import os
+import sys
+import tempfile
+import subprocess
+import numpy as np
+from datetime import datetime
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+from utils.price_store import PriceStore, ingest, ingest_csv, to_ns
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+
+class TestPriceStore(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.store = PriceStore(os.path.join(self.tmp.name, 'prices'))
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_range_read_is_memory_mapped_view(self):
+        self.store.append('AAPL', [1, 2, 3, 4], [10.0, 11.0, 12.0, 13.0])
+        full = self.store.read('AAPL')
+        window = self.store.read_range('AAPL', 2, 3)
+        self.assertEqual(window['close'].tolist(), [11.0, 12.0])
+        self.assertIsInstance(full, np.memmap)
+        self.assertTrue(np.shares_memory(window, full))
+
+    def test_out_of_order_append_merges(self):
+        self.store.append('AAPL', [1, 3], [10.0, 12.0])
+        self.store.append('AAPL', [2, 3], [11.0, 12.5])
+        self.assertEqual(self.store.read('AAPL')['close'].tolist(), [10.0, 11.0, 12.5])
+        # Numbers are stored as the epoch ns they are
+        self.assertEqual(self.store.latest('AAPL'), (3, 12.5))
+
+    def test_concurrent_writers_keep_every_record(self):
+        # Two processes interleave timestamps, so most appends land out of order and rewrite
+        code = ("import sys; sys.path.insert(0, {root!r}); from utils.price_store import PriceStore; "
+                "store = PriceStore({path!r}); "
+                "[store.append('AAPL', 10**18 + 2 * i + {offset}, 1.0) for i in range(300)]")
+        procs = [subprocess.Popen([sys.executable, '-c', code.format(root=ROOT, path=self.store.root, offset=offset)])
+                 for offset in (0, 1)]
+        for proc in procs:
+            self.assertEqual(proc.wait(), 0)
+        self.assertEqual(len(self.store.read('AAPL')), 600)
+
+    def test_offline_ingest_from_fixtures(self):
+        fixtures = os.path.join(self.tmp.name, 'fixtures')
+        os.makedirs(fixtures)
+        with open(os.path.join(fixtures, 'MSFT.csv'), 'w') as f:
+            f.write("Date,Open,Close\n2024-06-03,1,400.5\n2024-06-04,1,401.5\n")
+        counts = ingest(['MSFT'], self.store, fixtures_dir=fixtures, offline=True)
+        self.assertEqual(counts, {'MSFT': 2})
+        self.assertEqual(self.store.read('MSFT')['close'].tolist(), [400.5, 401.5])
+
+    def test_csv_with_symbol_column(self):
+        path = os.path.join(self.tmp.name, 'quotes.csv')
+        with open(path, 'w') as f:
+            f.write("symbol,timestamp,close\nAAPL,1,10\nTSLA,1,20\nAAPL,2,11\n")
+        self.assertEqual(ingest_csv(self.store, path), {'AAPL': 2, 'TSLA': 1})
+
+    def test_epoch_unit_is_inferred_from_magnitude(self):
+        expected = 1_700_000_000 * 1_000_000_000
+        for value in (1_700_000_000, 1_700_000_000_000, 1_700_000_000_000_000, expected):
+            with self.subTest(value=value):
+                self.assertEqual(to_ns(value), expected)
+        self.assertEqual(to_ns(1_700_000_000.5), expected + 500_000_000)
+        self.assertEqual(to_ns(5, unit='ms'), 5_000_000)
+        with self.assertRaises(ValueError):
+            to_ns(5, unit='days')
+        # Many CSV exports stamp rows in epoch ms
+        path = os.path.join(self.tmp.name, 'ms.csv')
+        with open(path, 'w') as f:
+            f.write("symbol,timestamp,close\nAAPL,1700000000000,10\n")
+        ingest_csv(self.store, path)
+        self.assertEqual(int(self.store.latest('AAPL')[0]), expected)
+
+    def test_pre_1973_history_is_not_scaled_twice(self):
+        path = os.path.join(self.tmp.name, 'old.csv')
+        with open(path, 'w') as f:
+            f.write("Date,Close\n1971-06-01,5.0\n")
+        ingest_csv(self.store, path, symbol='OLD')
+        expected = to_ns(datetime(1971, 6, 1))
+        self.assertLess(expected, 10**17)
+        self.assertEqual(self.store.latest('OLD'), (expected, 5.0))
+        self.assertEqual(len(self.store.read_range('OLD', expected, expected)), 1)
+
+if __name__ == '__main__':
+    unittest.main()
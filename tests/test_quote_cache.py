@@ -0,0 +1,63 @@
+import unittest
+import os
+import sys
+import time
+import subprocess
+import tempfile
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+from utils.quote_cache import QuoteCache
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+
+class TestQuoteCache(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.tmp.name, 'quotes.bin')
+        self.cache = QuoteCache(self.path, slots=8)
+
+    def tearDown(self):
+        self.cache.close()
+        self.tmp.cleanup()
+
+    def test_put_get_and_freshness(self):
+        self.assertIsNone(self.cache.get("AAPL"))
+        self.assertTrue(self.cache.put("AAPL", 101.5))
+        self.assertEqual(self.cache.get("AAPL")[0], 101.5)
+        self.assertEqual(self.cache.get_fresh("AAPL", 60), 101.5)
+        self.cache.put("AAPL", 102.0, time.time_ns() - 120 * 1_000_000_000)
+        self.assertIsNone(self.cache.get_fresh("AAPL", 60))
+
+    def test_collisions_and_full_cache(self):
+        symbols = [f"S{i}" for i in range(8)]
+        self.assertEqual(self.cache.put_many({s: float(i) for i, s in enumerate(symbols)}), 8)
+        self.assertFalse(self.cache.put("EXTRA", 1.0))
+        # A second handle on the same file finds every symbol along its probe path
+        other = QuoteCache(self.path, slots=1024)
+        self.assertEqual(other.slots, 8)
+        self.assertEqual({s: q[0] for s, q in other.items().items()}, {s: float(i) for i, s in enumerate(symbols)})
+        other.close()
+
+    def test_long_symbols_are_skipped(self):
+        long_symbol = "X" * 25
+        with self.assertLogs(level='WARNING'):
+            self.assertEqual(self.cache.put_many({long_symbol: 1.0, "AAPL": 2.0}), 1)
+        self.assertFalse(self.cache.put(long_symbol, 1.0))
+        self.assertIsNone(self.cache.get(long_symbol))
+        self.assertEqual(self.cache.get("AAPL")[0], 2.0)
+
+    def test_visible_across_processes(self):
+        code = (f"import sys; sys.path.insert(0, {ROOT!r}); from utils.quote_cache import QuoteCache; "
+                f"QuoteCache({self.path!r}).put('MSFT', 420.25)")
+        subprocess.run([sys.executable, '-c', code], check=True)
+        self.assertEqual(self.cache.get("MSFT")[0], 420.25)
+
+    def test_reads_are_fast(self):
+        self.cache.put("AAPL", 1.0)
+        started = time.perf_counter()
+        for _ in range(10000):
+            self.cache.get_fresh("AAPL", 60)
+        # Generous bound; typically a few microseconds per lookup
+        self.assertLess((time.perf_counter() - started) / 10000, 100e-6)
+
+if __name__ == '__main__':
+    unittest.main()
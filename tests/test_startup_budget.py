@@ -0,0 +1,30 @@
+import unittest
+import os
+import sys
+import tempfile
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+from benchmarks.import_time import STARTUP_BUDGETS_MS, LAZY_IMPORTS, measure_import, loaded_modules
+
+BUDGET_SCALE = float(os.environ.get('STARTUP_BUDGET_SCALE', 1))
+
+class TestStartupBudget(unittest.TestCase):
+    def setUp(self):
+        # Entry points create logging/ in the working directory on import
+        self.tmp = tempfile.TemporaryDirectory()
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_heavy_dependencies_load_lazily(self):
+        for module, heavy in LAZY_IMPORTS.items():
+            with self.subTest(module=module):
+                self.assertEqual(loaded_modules(module, heavy, cwd=self.tmp.name), [])
+
+    def test_entry_points_within_budget(self):
+        for module, budget in STARTUP_BUDGETS_MS.items():
+            with self.subTest(module=module):
+                elapsed = measure_import(module, repeat=3, cwd=self.tmp.name)
+                self.assertLessEqual(elapsed, budget * BUDGET_SCALE, f"{module} took {elapsed:.0f} ms")
+
+if __name__ == '__main__':
+    unittest.main()
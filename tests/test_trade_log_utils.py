@@ -0,0 +1,56 @@
+import unittest
+import os
+import sys
+import tempfile
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+from utils.trade_log_utils import (load_trade_log, save_trade_log, load_manifest, load_trade_range,
+                                   roll_trade_log)
+
+def make_trades(first_tid, last_tid, date="01-06-24", verified=True, symbols=("AAPL", "MSFT")):
+    return [{"transaction_id": f"{tid:05d}", "date": date, "time": "12:00:00", "symbol": symbol, "verified": verified}
+            for tid in range(first_tid, last_tid + 1) for symbol in symbols]
+
+class TestTieredTradeLog(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.log_path = os.path.join(self.tmp.name, 'trade_log.json')
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_roll_keeps_hot_window_and_indexes_segments(self):
+        log_data = {"new_trade": True, "trades": make_trades(1, 5, "01-06-24") + make_trades(6, 9, "02-06-24")}
+        archived = roll_trade_log(log_data, self.log_path, hot_transactions=4, segment_max_trades=6)
+        self.assertEqual(archived, 10)
+        self.assertEqual(log_data["trades"][0]["transaction_id"], "00006")
+        segments = load_manifest(self.log_path)["segments"]
+        self.assertEqual([(s["first_tid"], s["last_tid"], s["first_date"]) for s in segments],
+                         [(1, 3, "2024-06-01"), (4, 5, "2024-06-01")])
+
+    def test_unverified_transactions_stay_hot(self):
+        log_data = {"new_trade": True, "trades": make_trades(1, 3) + make_trades(4, 12, verified=False)}
+        self.assertEqual(roll_trade_log(log_data, self.log_path, hot_transactions=4), 6)
+        self.assertEqual(log_data["trades"][0]["transaction_id"], "00004")
+        self.assertEqual(len(log_data["trades"]), 18)
+
+    def test_transactions_are_not_split_across_segments(self):
+        symbols = ("A", "B", "C", "D")
+        log_data = {"new_trade": True, "trades": make_trades(1, 12, symbols=symbols)}
+        roll_trade_log(log_data, self.log_path, hot_transactions=4, segment_max_trades=3)
+        segments = load_manifest(self.log_path)["segments"]
+        self.assertEqual(len({s["file"] for s in segments}), len(segments))
+        archived = load_trade_range(end_tid=8, log_path=self.log_path)
+        self.assertEqual(sorted((t["transaction_id"], t["symbol"]) for t in archived),
+                         [(f"{tid:05d}", s) for tid in range(1, 9) for s in symbols])
+
+    def test_default_load_is_hot_and_ranges_reach_archive(self):
+        save_trade_log({"new_trade": True, "trades": make_trades(1, 250)}, self.log_path)
+        hot = load_trade_log(self.log_path)["trades"]
+        self.assertEqual(len(hot), 200)
+        self.assertEqual(len(load_trade_log(self.log_path, include_archive=True)["trades"]), 500)
+        trades = load_trade_range(start_tid=149, end_tid=152, log_path=self.log_path)
+        self.assertEqual(sorted({t["transaction_id"] for t in trades}), ["00149", "00150", "00151", "00152"])
+        self.assertEqual(load_trade_range(start_date="2024-06-02", log_path=self.log_path), [])
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,52 @@
+import unittest
+import os
+import sys
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+from utils.trade_record import Trade, decode_tids, select_indices, group_indices
+from benchmarks.trade_grouping import run
+
+ROW = {
+    "transaction_id": "00012",
+    "time": "12:01:02",
+    "date": "01-06-24",
+    "symbol": "AAPL",
+    "action": "Buy",
+    "shares_changed": 1.5,
+    "shares_held": 1.5,
+    "current_price": None,
+    "amount": 0.0,
+    "allocation": 0.5,
+    "cash": 10.0,
+    "portfolio_value": 20.0,
+    "final_cash": 10.0,
+}
+
+class TestTradeRecord(unittest.TestCase):
+    def test_legacy_round_trip(self):
+        trade = Trade.from_dict(ROW)
+        self.assertEqual(trade.tid, 12)
+        self.assertIs(trade.symbol, sys.intern("AAPL"))
+        self.assertEqual(trade.to_dict(), ROW)
+        extended = dict(ROW, verified=True, note="kept")
+        self.assertEqual(Trade.from_dict(extended).to_dict(), extended)
+
+    def test_slots(self):
+        with self.assertRaises(AttributeError):
+            Trade.from_dict(ROW).other = 1
+
+    def test_group_and_select_on_tids(self):
+        rows = [dict(ROW, transaction_id=tid, symbol=sym) for tid, sym in
+                (("00010", "MSFT"), ("00002", "AAPL"), ("00010", "AAPL"), ("00009", "TSLA"))]
+        tids = decode_tids(rows)
+        self.assertEqual(list(group_indices(tids).items()), [(2, [1]), (9, [3]), (10, [0, 2])])
+        self.assertEqual(select_indices(tids, end_tid=9), [1, 3])
+        self.assertEqual(select_indices(tids, start_tid=10), [0, 2])
+        self.assertEqual(max(tids), 10)
+
+    def test_tid_only_path_is_faster(self):
+        for case, (full, tids) in run(5000, repeat=2).items():
+            with self.subTest(case=case):
+                self.assertLess(tids, full)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -1,15 +1,101 @@
 import unittest
 from unittest.mock import patch, MagicMock
-from smart_m1_trading_agent_llm import SmartM1TradingAgent
+import os
+import sys
+import time
+import tempfile
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+from agents.trading_agent import SmartM1TradingAgent
+from utils.trade_log_utils import save_trade_log
+from utils.price_store import PriceStore
+from utils.quote_cache import QuoteCache
 
 class TestSmartM1TradingAgent(unittest.TestCase):
-    @patch('smart_m1_trading_agent_llm.MCPClient')
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.quote_cache = QuoteCache(os.path.join(self.tmp.name, 'quotes.bin'), slots=64)
+        self.price_store = PriceStore(os.path.join(self.tmp.name, 'prices'))
+
+    def tearDown(self):
+        self.quote_cache.close()
+        self.tmp.cleanup()
+
+    def make_agent(self, **kwargs):
+        # Every file the agent touches lives in the temp dir
+        return SmartM1TradingAgent(api_key='dummy', log_path=os.path.join(self.tmp.name, 'trade_log.json'),
+                                   analytics_path=os.path.join(self.tmp.name, 'analytics.json'),
+                                   values_path=os.path.join(self.tmp.name, 'values.jsonl'),
+                                   price_store=self.price_store,
+                                   quote_cache=self.quote_cache,
+                                   valuation_dir=os.path.join(self.tmp.name, 'valuations'), **kwargs)
+
+    @patch('agents.trading_agent.MCPClient')
     def test_generate_portfolio_with_llm(self, MockMCPClient):
         mock_mcp = MockMCPClient.return_value
         mock_mcp.send.return_value = '{"AAPL": 0.6, "MSFT": 0.4}'
-        agent = SmartM1TradingAgent(api_key='dummy')
+        agent = self.make_agent()
         agent.generate_portfolio_with_llm()
         self.assertEqual(agent.portfolio, {"AAPL": 0.6, "MSFT": 0.4})
 
+    @patch('agents.trading_agent.save_analytics')
+    @patch('agents.trading_agent.append_value_point')
+    @patch('agents.trading_agent.save_trade_log')
+    @patch('agents.trading_agent.load_trade_log', return_value={"new_trade": False, "trades": []})
+    @patch('agents.trading_agent.MCPClient')
+    def test_rebalance_portfolio_logs_fills(self, MockMCPClient, mock_load, mock_save, *_):
+        from utils.execution_engine import ExecutionEngine
+        from services.mock_broker import MockBroker
+        broker = MockBroker(latency=(0, 0), fill_delay=0, partial_fill_rate=0, slippage=0, seed=1)
+        agent = self.make_agent(execution=ExecutionEngine(broker, poll_interval=0.01, rate_limit=0))
+        agent.portfolio = {"AAPL": 0.5, "MSFT": 0.5}
+        with patch.object(agent, 'get_price', side_effect=lambda s: {"AAPL": 100.0, "MSFT": 250.0}[s]):
+            agent.rebalance_portfolio()
+        trades = mock_save.call_args[0][0]["trades"]
+        self.assertEqual({t["symbol"]: (t["action"], t["shares_held"], t["order_status"]) for t in trades},
+                         {"AAPL": ("Buy", 5.0, "filled"), "MSFT": ("Buy", 2.0, "filled")})
+        self.assertAlmostEqual(agent.cash, 0.0)
+        self.assertAlmostEqual(trades[-1]["portfolio_value"], 1000.0)
+
+    @patch('agents.trading_agent.save_analytics')
+    @patch('agents.trading_agent.append_value_point')
+    @patch('agents.trading_agent.save_trade_log')
+    @patch('agents.trading_agent.load_trade_log', return_value={"new_trade": False, "trades": []})
+    @patch('agents.trading_agent.MCPClient')
+    def test_rebalance_rows_follow_execution_order(self, MockMCPClient, mock_load, mock_save, *_):
+        from utils.execution_engine import ExecutionEngine
+        from services.mock_broker import MockBroker
+        broker = MockBroker(latency=(0, 0), fill_delay=0, partial_fill_rate=0, slippage=0, seed=1)
+        agent = self.make_agent(execution=ExecutionEngine(broker, poll_interval=0.01, rate_limit=0))
+        agent.holdings, agent.cash = {"ZZZ": 10.0}, 0.0
+        agent.portfolio = {"AAA": 1.0}
+        with patch.object(agent, 'get_price', side_effect=lambda s: 100.0):
+            agent.rebalance_portfolio()
+        trades = mock_save.call_args[0][0]["trades"]
+        # The sale is sent first, so the buy sees its proceeds
+        self.assertEqual([(t["symbol"], t["action"], t["cash"]) for t in trades],
+                         [("ZZZ", "Sell", 1000.0), ("AAA", "Buy", 0.0)])
+
+    @patch('agents.trading_agent.MCPClient')
+    def test_constructor_writes_nothing_and_commit_rebuilds_analytics(self, MockMCPClient):
+        history = [{"transaction_id": "00001", "symbol": "AAPL", "action": "Buy", "shares_changed": 1.0,
+                    "shares_held": 1.0, "current_price": 100.0, "amount": 100.0, "allocation": 1.0,
+                    "cash": 900.0, "final_cash": 900.0}]
+        save_trade_log({"new_trade": True, "trades": history}, os.path.join(self.tmp.name, 'trade_log.json'))
+        before = sorted(os.listdir(self.tmp.name))
+        agent = self.make_agent()
+        self.assertEqual(sorted(os.listdir(self.tmp.name)), before)
+        self.assertEqual((agent.transaction_id, agent.cash), (1, 900.0))
+        agent.holdings = {"AAPL": 2.0}
+        agent._commit_transaction([dict(history[0], transaction_id="00002", shares_changed=1.0, shares_held=2.0,
+                                        cash=800.0)], {"AAPL": 100.0}, 800.0)
+        # The missing state was rebuilt from the whole log, new transaction included
+        self.assertEqual(agent.analytics.last_transaction_id, 2)
+        self.assertTrue(os.path.exists(os.path.join(self.tmp.name, 'analytics.json')))
+        # Intraday snapshots taken since then are folded into drawdown at the next commit
+        PriceStore(os.path.join(self.tmp.name, 'valuations')).append('portfolio', [time.time_ns()], [400.0])
+        agent._commit_transaction([dict(history[0], transaction_id="00003", action="Hold", shares_changed=0.0,
+                                        shares_held=2.0, cash=800.0)], {"AAPL": 100.0}, 800.0)
+        self.assertAlmostEqual(agent.analytics.max_drawdown, 0.6)
+
 if __name__ == '__main__':
     unittest.main() 
\ No newline at end of file
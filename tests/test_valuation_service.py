@@ -0,0 +1,66 @@
+import unittest
+import os
+import sys
+import tempfile
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+from utils.trade_log_utils import save_trade_log
+from utils.price_store import PriceStore
+from utils.quote_cache import QuoteCache
+from services.valuation_service import ValuationService
+
+def make_trade(symbol, shares_held, price, cash):
+    return {"transaction_id": "00001", "symbol": symbol, "shares_held": shares_held,
+            "current_price": price, "final_cash": cash}
+
+class TestValuationService(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.log_path = os.path.join(self.tmp.name, 'trade_log.json')
+        self.value_store = PriceStore(os.path.join(self.tmp.name, 'valuations'))
+        self.quotes = {}
+        self.requests = []
+        self.quote_cache = QuoteCache(os.path.join(self.tmp.name, 'quotes.bin'), slots=64)
+
+    def tearDown(self):
+        self.quote_cache.close()
+        self.tmp.cleanup()
+
+    def fetch(self, symbols):
+        self.requests.append(list(symbols))
+        return {s: self.quotes[s] for s in symbols if s in self.quotes}
+
+    def make_service(self, trades, max_symbols=50):
+        save_trade_log({"new_trade": True, "trades": trades}, self.log_path)
+        return ValuationService(max_symbols=max_symbols, fetch_quotes=self.fetch, log_path=self.log_path,
+                                price_store=PriceStore(os.path.join(self.tmp.name, 'prices')),
+                                value_store=self.value_store, quote_cache=self.quote_cache)
+
+    def test_value_follows_price_moves_and_skips_unchanged(self):
+        service = self.make_service([make_trade("AAPL", 2, 100.0, 50.0), make_trade("MSFT", 1, 300.0, 50.0)])
+        self.quotes = {"AAPL": 110.0, "MSFT": 300.0}
+        self.assertEqual(service.run_once(), ["AAPL"])
+        self.assertAlmostEqual(service.value, 570.0)
+        # Nothing moved and the log is unchanged: no new snapshot
+        self.assertEqual(service.run_once(), [])
+        self.assertEqual(self.value_store.read('portfolio')['close'].tolist(), [570.0])
+        # Fetched quotes are published for the other services
+        self.assertEqual(self.quote_cache.get("MSFT")[0], 300.0)
+
+    def test_long_symbol_does_not_stop_the_cycle(self):
+        long_symbol = "L" * 30
+        service = self.make_service([make_trade("AAPL", 1, 100.0, 0.0), make_trade(long_symbol, 1, 10.0, 0.0)])
+        self.quotes = {"AAPL": 101.0, long_symbol: 11.0}
+        with self.assertLogs(level='WARNING'):
+            self.assertEqual(sorted(service.run_once()), sorted(["AAPL", long_symbol]))
+        self.assertAlmostEqual(service.value, 112.0)
+        self.assertIsNone(self.quote_cache.get(long_symbol))
+
+    def test_quotes_are_batched_within_budget(self):
+        trades = [make_trade(f"S{i}", 1, 10.0, 0.0) for i in range(5)]
+        service = self.make_service(trades, max_symbols=2)
+        for _ in range(3):
+            service.run_once()
+        self.assertEqual(self.requests, [["S0", "S1"], ["S2", "S3"], ["S4", "S0"]])
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,135 @@
+import os
+import time
+import logging
+import threading
+from collections import deque
+
+CLOSED = 'closed'
+OPEN = 'open'
+HALF_OPEN = 'half_open'
+
+# Defaults; each breaker can override them with <NAME>_CIRCUIT_* environment variables
+CIRCUIT_WINDOW = 20
+CIRCUIT_MIN_CALLS = 5
+CIRCUIT_ERROR_RATE = 0.5
+CIRCUIT_OPEN_SECONDS = 30.0
+CIRCUIT_HALF_OPEN_PROBES = 1
+
+
+class CircuitOpenError(Exception):
+    """Raised instead of calling a dependency whose breaker is open."""
+
+
+class CircuitBreaker:
+    """
+    Per-dependency breaker over the last `window` calls. A call fails if it raises
+    (a call's own timeout included) or, only when latency_threshold is set, if it
+    takes longer than that many seconds. Once at least min_calls are recorded
+    and the failure share reaches error_rate, the breaker opens and calls fail fast for
+    open_seconds. It then lets up to half_open_probes calls through; a successful
+    probe closes it, a failed one reopens it.
+    """
+    def __init__(self, name, window=CIRCUIT_WINDOW, min_calls=CIRCUIT_MIN_CALLS, error_rate=CIRCUIT_ERROR_RATE,
+                 latency_threshold=None, open_seconds=CIRCUIT_OPEN_SECONDS, half_open_probes=CIRCUIT_HALF_OPEN_PROBES):
+        self.name = name
+        self.min_calls = min_calls
+        self.error_rate = error_rate
+        self.latency_threshold = latency_threshold
+        self.open_seconds = open_seconds
+        self.half_open_probes = half_open_probes
+        self.results = deque(maxlen=window)
+        self.state = CLOSED
+        self.opened_at = 0.0
+        self.probes = 0
+        self.lock = threading.Lock()
+
+    @classmethod
+    def from_env(cls, name, **defaults):
+        """Breaker with <NAME>_CIRCUIT_{ERROR_RATE,LATENCY_SECONDS,OPEN_SECONDS,MIN_CALLS,HALF_OPEN_PROBES} overrides."""
+        prefix = f"{name.upper()}_CIRCUIT_"
+        env = {
+            'error_rate': ('ERROR_RATE', float),
+            'latency_threshold': ('LATENCY_SECONDS', float),
+            'open_seconds': ('OPEN_SECONDS', float),
+            'min_calls': ('MIN_CALLS', int),
+            'half_open_probes': ('HALF_OPEN_PROBES', int),
+        }
+        for key, (suffix, convert) in env.items():
+            value = os.environ.get(prefix + suffix)
+            if value:
+                defaults[key] = convert(value)
+        return cls(name, **defaults)
+
+    def allow(self):
+        """Whether a call may go ahead now. In half-open state this reserves a probe."""
+        with self.lock:
+            if self.state == OPEN:
+                if time.monotonic() - self.opened_at < self.open_seconds:
+                    return False
+                self.state = HALF_OPEN
+                self.probes = 0
+                logging.info(f"Circuit {self.name} half-open, probing")
+            if self.state == HALF_OPEN:
+                if self.probes >= self.half_open_probes:
+                    return False
+                self.probes += 1
+            return True
+
+    def record(self, success, latency=None):
+        """Record the outcome of an allowed call."""
+        if success and self.latency_threshold and latency is not None and latency > self.latency_threshold:
+            success = False
+        with self.lock:
+            if self.state == HALF_OPEN:
+                self.probes = max(self.probes - 1, 0)
+                if success:
+                    self.state = CLOSED
+                    self.results.clear()
+                    logging.info(f"Circuit {self.name} closed")
+                else:
+                    self._open()
+                return
+            self.results.append(success)
+            failures = self.results.count(False)
+            if (self.state == CLOSED and len(self.results) >= self.min_calls
+                    and failures >= self.error_rate * len(self.results)):
+                self._open()
+
+    def _open(self):
+        self.state = OPEN
+        self.opened_at = time.monotonic()
+        logging.warning(f"Circuit {self.name} open for {self.open_seconds:.0f}s")
+
+    def call(self, fn, *args, **kwargs):
+        """Run fn through the breaker; raises CircuitOpenError without calling it while open."""
+        if not self.allow():
+            raise CircuitOpenError(f"{self.name} circuit is open")
+        started = time.monotonic()
+        try:
+            result = fn(*args, **kwargs)
+        except Exception:
+            self.record(False)
+            raise
+        self.record(True, time.monotonic() - started)
+        return result
+
+
+class StaleCache:
+    """Last good value per key, served for up to max_age_seconds after it was stored."""
+    def __init__(self, max_age_seconds):
+        self.max_age_seconds = max_age_seconds
+        self.values = {}
+        self.lock = threading.Lock()
+
+    def put(self, key, value):
+        with self.lock:
+            self.values[key] = (value, time.time())
+
+    def get(self, key):
+        """(value, age_seconds), or None if missing or older than the bound."""
+        with self.lock:
+            entry = self.values.get(key)
+        if entry is None:
+            return None
+        age = time.time() - entry[1]
+        return (entry[0], age) if age <= self.max_age_seconds else None
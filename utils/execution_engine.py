@@ -0,0 +1,234 @@
+import os
+import time
+import asyncio
+import logging
+
+# Orders in flight at once
+EXECUTION_MAX_CONCURRENCY = int(os.environ.get('EXECUTION_MAX_CONCURRENCY', 8))
+# Broker request budget: sustained requests per second, with bursts up to EXECUTION_RATE_BURST
+EXECUTION_RATE_LIMIT = float(os.environ.get('EXECUTION_RATE_LIMIT', 10))
+EXECUTION_RATE_BURST = int(os.environ.get('EXECUTION_RATE_BURST', 5))
+# How often open orders are polled for fills
+EXECUTION_POLL_INTERVAL = float(os.environ.get('EXECUTION_POLL_INTERVAL', 0.25))
+# Deadline for a whole rebalance: orders still open then are cancelled and kept at
+# whatever filled, and orders not yet sent are dropped
+EXECUTION_ORDER_TIMEOUT = float(os.environ.get('EXECUTION_ORDER_TIMEOUT', 10))
+# Share of that deadline the sells get when buys follow; leftover sells are cancelled at
+# the cutoff so the buys always keep the rest of the budget
+EXECUTION_SELL_PHASE_SHARE = float(os.environ.get('EXECUTION_SELL_PHASE_SHARE', 0.5))
+BROKER_URL = os.environ.get('BROKER_URL', 'http://localhost:8070')
+# Share deltas smaller than this are not worth an order
+MIN_ORDER_SHARES = 0.0001
+
+OPEN_STATUSES = ('new', 'accepted', 'partially_filled')
+TERMINAL_STATUSES = ('filled', 'cancelled', 'rejected', 'expired')
+
+
+class Order:
+    """One order and its fill state, as last reported by the broker."""
+    def __init__(self, symbol, side, quantity, price=None):
+        self.symbol = symbol
+        self.side = side
+        self.quantity = quantity
+        # Reference price from the quote used to size the order
+        self.price = price
+        self.client_order_id = None
+        self.order_id = None
+        self.status = 'new'
+        self.filled_qty = 0.0
+        self.avg_price = None
+        self.error = None
+        self.latency = None
+
+    @property
+    def signed_filled(self):
+        return self.filled_qty if self.side == 'buy' else -self.filled_qty
+
+    def update(self, report):
+        """Apply a broker order report (dict with order_id, status, filled_qty, avg_price)."""
+        self.order_id = report.get('order_id', self.order_id)
+        self.status = report.get('status', self.status)
+        self.filled_qty = float(report.get('filled_qty') or 0.0)
+        self.avg_price = report.get('avg_price', self.avg_price)
+        self.error = report.get('error', self.error)
+
+    def __repr__(self):
+        return (f"Order({self.side} {self.quantity:.4f} {self.symbol}, status={self.status!r}, "
+                f"filled={self.filled_qty:.4f})")
+
+
+def target_holdings(allocation, prices, max_investment):
+    """Target share counts for an allocation; symbols without a price are left out."""
+    return {symbol: max_investment * weight / prices[symbol]
+            for symbol, weight in allocation.items() if prices.get(symbol)}
+
+
+def plan_orders(holdings, targets, prices=None, min_shares=MIN_ORDER_SHARES):
+    """
+    Net current holdings against targets into one order per symbol. Symbols held but
+    absent from targets are sold out. Sells come first (largest first) so their
+    proceeds are available before any buy is sent.
+    """
+    prices = prices or {}
+    orders = []
+    for symbol in sorted(set(holdings) | set(targets)):
+        delta = targets.get(symbol, 0.0) - holdings.get(symbol, 0.0)
+        if abs(delta) < min_shares:
+            continue
+        orders.append(Order(symbol, 'buy' if delta > 0 else 'sell', abs(delta), prices.get(symbol)))
+    sells = sorted((o for o in orders if o.side == 'sell'), key=lambda o: -o.quantity * (o.price or 0))
+    buys = sorted((o for o in orders if o.side == 'buy'), key=lambda o: -o.quantity * (o.price or 0))
+    return sells + buys
+
+
+def apply_fills(orders, holdings, cash):
+    """New holdings and cash after the filled part of each order."""
+    holdings = dict(holdings)
+    for order in orders:
+        if not order.filled_qty:
+            continue
+        price = order.avg_price if order.avg_price is not None else order.price
+        holdings[order.symbol] = holdings.get(order.symbol, 0.0) + order.signed_filled
+        cash -= order.signed_filled * price
+    return holdings, cash
+
+
+class TokenBucket:
+    """Async rate limiter: rate tokens per second, holding at most burst."""
+    def __init__(self, rate=EXECUTION_RATE_LIMIT, burst=EXECUTION_RATE_BURST):
+        self.rate = rate
+        self.burst = burst
+        self.tokens = float(burst)
+        self.updated = time.monotonic()
+        self.lock = asyncio.Lock()
+
+    async def acquire(self):
+        if self.rate <= 0:
+            return
+        async with self.lock:
+            while True:
+                now = time.monotonic()
+                self.tokens = min(self.burst, self.tokens + (now - self.updated) * self.rate)
+                self.updated = now
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+                await asyncio.sleep((1 - self.tokens) / self.rate)
+
+
+class HTTPBroker:
+    """
+    Broker client for the REST API served by services/mock_broker.py. Any broker works
+    with ExecutionEngine if it has the same three methods, each returning an order report.
+    """
+    def __init__(self, base_url=BROKER_URL, api_key=None, timeout=5):
+        import requests
+        self.base_url = base_url.rstrip('/')
+        self.timeout = timeout
+        self.session = requests.Session()
+        if api_key:
+            self.session.headers['Authorization'] = f"Bearer {api_key}"
+
+    def _json(self, response):
+        response.raise_for_status()
+        return response.json()
+
+    def submit_order(self, symbol, side, quantity, price=None, client_order_id=None):
+        payload = {"symbol": symbol, "side": side, "quantity": quantity, "price": price,
+                   "client_order_id": client_order_id}
+        return self._json(self.session.post(f"{self.base_url}/orders", json=payload, timeout=self.timeout))
+
+    def get_order(self, order_id):
+        return self._json(self.session.get(f"{self.base_url}/orders/{order_id}", timeout=self.timeout))
+
+    def cancel_order(self, order_id):
+        return self._json(self.session.delete(f"{self.base_url}/orders/{order_id}", timeout=self.timeout))
+
+
+class ExecutionEngine:
+    """
+    Sends a rebalance's orders concurrently: all sells, then all buys. In-flight orders
+    are capped by a semaphore and broker requests by a token bucket. The whole batch
+    has one deadline, order_timeout seconds after it starts, split between the phases:
+    when buys follow, sells stop at sell_share of it and the buys get the remainder.
+    Orders open at their phase's cutoff are cancelled and kept at their partial fill,
+    and unsent ones expire, so a cycle takes about order_timeout however many
+    positions it trades. The broker's methods are blocking and run in worker threads.
+    """
+    def __init__(self, broker, max_concurrency=EXECUTION_MAX_CONCURRENCY, rate_limit=EXECUTION_RATE_LIMIT,
+                 burst=EXECUTION_RATE_BURST, poll_interval=EXECUTION_POLL_INTERVAL,
+                 order_timeout=EXECUTION_ORDER_TIMEOUT, sell_share=EXECUTION_SELL_PHASE_SHARE):
+        self.broker = broker
+        self.max_concurrency = max_concurrency
+        self.rate_limit = rate_limit
+        self.burst = burst
+        self.poll_interval = poll_interval
+        self.order_timeout = order_timeout
+        self.sell_share = sell_share
+
+    async def _request(self, method, *args, **kwargs):
+        await self.bucket.acquire()
+        return await asyncio.to_thread(method, *args, **kwargs)
+
+    async def _execute(self, order, batch_id):
+        order.client_order_id = f"{batch_id}-{order.symbol}-{order.side}"
+        async with self.semaphore:
+            started = time.monotonic()
+            if started >= self.deadline:
+                # Never sent: the batch ran out of time while this order waited for a slot
+                order.status = 'expired'
+                order.latency = 0.0
+                return order
+            deadline = self.deadline
+            try:
+                order.update(await self._request(self.broker.submit_order, order.symbol, order.side, order.quantity,
+                                                 price=order.price, client_order_id=order.client_order_id))
+                while order.status in OPEN_STATUSES and time.monotonic() < deadline:
+                    await asyncio.sleep(max(min(self.poll_interval, deadline - time.monotonic()), 0))
+                    order.update(await self._request(self.broker.get_order, order.order_id))
+                if order.status in OPEN_STATUSES:
+                    order.update(await self._request(self.broker.cancel_order, order.order_id))
+            except Exception as e:
+                logging.warning(f"Order {order.client_order_id} failed: {e}")
+                order.error = str(e)
+                if order.status in OPEN_STATUSES and not order.filled_qty:
+                    order.status = 'rejected'
+            order.latency = time.monotonic() - started
+        return order
+
+    async def execute_async(self, orders, cash=None, batch_id=None):
+        """
+        Execute planned orders. If cash is given, buys are scaled down to fit the cash
+        on hand after the sells have filled.
+        """
+        self.semaphore = asyncio.Semaphore(self.max_concurrency)
+        self.bucket = TokenBucket(self.rate_limit, self.burst)
+        started = time.monotonic()
+        batch_id = batch_id or str(time.time_ns())
+        sells = [o for o in orders if o.side == 'sell']
+        buys = [o for o in orders if o.side == 'buy']
+        # A partly filled sell stays open until its cutoff, so it must not use up the buys' time
+        self.deadline = started + self.order_timeout * (self.sell_share if buys else 1.0)
+        await asyncio.gather(*(self._execute(o, batch_id) for o in sells))
+        self.deadline = started + self.order_timeout
+        if cash is not None and buys:
+            cash -= sum(o.signed_filled * (o.avg_price or o.price or 0) for o in sells)
+            cost = sum(o.quantity * (o.price or 0) for o in buys)
+            if cost > cash:
+                scale = max(cash, 0.0) / cost
+                logging.warning(f"Buys need ${cost:,.2f} but ${cash:,.2f} is available; scaling by {scale:.3f}")
+                for order in buys:
+                    order.quantity *= scale
+                buys = [o for o in buys if o.quantity >= MIN_ORDER_SHARES]
+        await asyncio.gather(*(self._execute(o, batch_id) for o in buys))
+        return sells + buys
+
+    def execute(self, orders, cash=None, batch_id=None):
+        """Blocking wrapper around execute_async. Returns the orders that were sent."""
+        started = time.monotonic()
+        sent = asyncio.run(self.execute_async(orders, cash, batch_id))
+        filled = sum(1 for o in sent if o.status == 'filled')
+        partial = sum(1 for o in sent if o.status != 'filled' and o.filled_qty)
+        logging.info(f"Executed {len(sent)} orders in {time.monotonic() - started:.2f}s: "
+                     f"{filled} filled, {partial} partial, {len(sent) - filled - partial} unfilled")
+        return sent
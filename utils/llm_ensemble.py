@@ -0,0 +1,157 @@
+import os
+import re
+import json
+import time
+import logging
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+
+# Comma-separated model names; repeat a name to draw several samples from it.
+# Empty disables ensemble mode.
+LLM_ENSEMBLE_MODELS = [m.strip() for m in os.environ.get('LLM_ENSEMBLE_MODELS', '').split(',') if m.strip()]
+LLM_COMBINE_RULE = os.environ.get('LLM_COMBINE_RULE', 'first_valid')
+LLM_DEADLINE_SECONDS = float(os.environ.get('LLM_DEADLINE_SECONDS', 45))
+# A request still running after this percentile of recent latencies gets a duplicate
+LLM_HEDGE_PERCENTILE = float(os.environ.get('LLM_HEDGE_PERCENTILE', 0.9))
+# Hedge delay used until enough latencies have been observed
+LLM_HEDGE_DEFAULT_DELAY = float(os.environ.get('LLM_HEDGE_DEFAULT_DELAY', 10))
+
+COMBINE_RULES = ('first_valid', 'median', 'vote')
+
+
+def parse_allocation(text):
+    """Extract a {symbol: weight} dict from LLM output, or None if it is unusable."""
+    match = re.search(r'\{.*\}', text or '', re.DOTALL)
+    if not match:
+        return None
+    try:
+        data = json.loads(match.group(0))
+    except ValueError:
+        return None
+    if not isinstance(data, dict) or not data:
+        return None
+    try:
+        allocation = {str(symbol): float(weight) for symbol, weight in data.items()}
+    except (TypeError, ValueError):
+        return None
+    if any(weight < 0 for weight in allocation.values()) or sum(allocation.values()) <= 0:
+        return None
+    return allocation
+
+
+def _normalize(weights):
+    total = sum(weights.values())
+    if total <= 0:
+        return {}
+    return {symbol: weight / total for symbol, weight in weights.items() if weight > 0}
+
+
+def _median(values):
+    values = sorted(values)
+    mid = len(values) // 2
+    return values[mid] if len(values) % 2 else (values[mid - 1] + values[mid]) / 2
+
+
+def combine_allocations(allocations, rule='first_valid'):
+    """
+    Merge parsed allocations (in completion order) into one.
+    first_valid: the earliest valid answer.
+    median: per-symbol median weight (missing counts as 0), renormalized.
+    vote: symbols proposed by a majority, at their mean weight, renormalized.
+    """
+    if not allocations:
+        return {}
+    if rule == 'first_valid':
+        return allocations[0]
+    symbols = set().union(*allocations)
+    if rule == 'median':
+        return _normalize({s: _median([a.get(s, 0.0) for a in allocations]) for s in symbols})
+    if rule == 'vote':
+        weights = {}
+        for symbol in symbols:
+            votes = [a[symbol] for a in allocations if a.get(symbol, 0) > 0]
+            if len(votes) * 2 > len(allocations):
+                weights[symbol] = sum(votes) / len(votes)
+        return _normalize(weights)
+    raise ValueError(f"Unknown combine rule: {rule}")
+
+
+class LatencyTracker:
+    """Recent request latencies, used to pick the hedge delay."""
+    def __init__(self, size=50, default=LLM_HEDGE_DEFAULT_DELAY):
+        self.samples = deque(maxlen=size)
+        self.default = default
+
+    def record(self, seconds):
+        self.samples.append(seconds)
+
+    def percentile(self, p):
+        if len(self.samples) < 5:
+            return self.default
+        ordered = sorted(self.samples)
+        return ordered[min(int(p * len(ordered)), len(ordered) - 1)]
+
+
+class EnsembleQuery:
+    """
+    Send one prompt to several models/samples at once, hedge stragglers with a
+    duplicate request after a percentile-based delay and stop at a deadline.
+    send(prompt, model, options, timeout) must return the raw LLM text.
+    """
+    def __init__(self, send, models=None, rule=LLM_COMBINE_RULE, deadline=LLM_DEADLINE_SECONDS,
+                 hedge_percentile=LLM_HEDGE_PERCENTILE, latencies=None):
+        if rule not in COMBINE_RULES:
+            raise ValueError(f"Unknown combine rule: {rule}")
+        self.send = send
+        self.models = models or LLM_ENSEMBLE_MODELS
+        self.rule = rule
+        self.deadline = deadline
+        self.hedge_percentile = hedge_percentile
+        self.latencies = latencies or LatencyTracker()
+        # Each slot may run a primary and a hedge request
+        self.executor = ThreadPoolExecutor(max_workers=2 * len(self.models), thread_name_prefix='llm-ensemble')
+
+    def _call(self, prompt, slot, started):
+        # Distinct seeds make repeated models independent samples
+        text = self.send(prompt, self.models[slot], {"seed": slot}, self.deadline)
+        return slot, time.monotonic() - started, parse_allocation(text)
+
+    def run(self, prompt):
+        """Return the combined allocation, or {} if nothing valid arrived before the deadline."""
+        start = time.monotonic()
+        deadline = start + self.deadline
+        hedge_delay = self.latencies.percentile(self.hedge_percentile)
+        pending = {self.executor.submit(self._call, prompt, slot, start) for slot in range(len(self.models))}
+        hedged = set()
+        answered = set()
+        results = []
+        while pending:
+            now = time.monotonic()
+            if now >= deadline:
+                break
+            next_hedge = start + hedge_delay if len(hedged) < len(self.models) and now < start + hedge_delay else deadline
+            done, pending = wait(pending, timeout=min(next_hedge, deadline) - now, return_when=FIRST_COMPLETED)
+            for future in done:
+                try:
+                    slot, latency, allocation = future.result()
+                except Exception as e:
+                    logging.warning(f"Ensemble request failed: {e}")
+                    continue
+                self.latencies.record(latency)
+                if slot in answered or allocation is None:
+                    continue
+                answered.add(slot)
+                results.append(allocation)
+            if self.rule == 'first_valid' and results:
+                break
+            if len(answered) == len(self.models):
+                break
+            if time.monotonic() >= start + hedge_delay:
+                for slot in range(len(self.models)):
+                    if slot not in answered and slot not in hedged:
+                        hedged.add(slot)
+                        pending.add(self.executor.submit(self._call, prompt, slot, time.monotonic()))
+        for future in pending:
+            future.cancel()
+        logging.info(f"Ensemble: {len(results)}/{len(self.models)} valid answers in {time.monotonic() - start:.2f}s ({len(hedged)} hedged)")
+        return combine_allocations(results, self.rule)
@@ -0,0 +1,124 @@
+import os
+import json
+import queue
+import atexit
+import logging
+from logging.handlers import QueueHandler, QueueListener, TimedRotatingFileHandler
+
+LOG_DIR = 'logging'
+# Longest message (in characters) written to any handler; the rest is replaced by a marker
+LOG_MAX_PAYLOAD = int(os.environ.get('LOG_MAX_PAYLOAD', 1000))
+CONSOLE_FORMAT = '%(asctime)s [%(levelname)s] %(message)s'
+
+
+def truncate(text, limit=LOG_MAX_PAYLOAD):
+    if limit and len(text) > limit:
+        return f"{text[:limit]}... [truncated {len(text) - limit} chars]"
+    return text
+
+
+def summarize_trade_payload(payload):
+    """Describe a JSON list of trades as count, last transaction_id and size, without parsing it."""
+    count = payload.count('"transaction_id"')
+    tid = None
+    pos = payload.rfind('"transaction_id"')
+    if pos >= 0:
+        start = payload.find('"', payload.find(':', pos) + 1) + 1
+        tid = payload[start:payload.find('"', start)]
+    return f"{count} trades, last transaction_id {tid}, {len(payload)} bytes"
+
+
+def summarize_prompt(prompt):
+    """Loggable form of an MCP prompt: trade batches as a summary, anything else truncated."""
+    if prompt.startswith('RECORD_TRADES:'):
+        return f"RECORD_TRADES: {summarize_trade_payload(prompt[len('RECORD_TRADES:'):])}"
+    return truncate(prompt)
+
+
+class JsonLineFormatter(logging.Formatter):
+    """One JSON object per line: ts, level, service, logger, msg."""
+    def __init__(self, service):
+        super().__init__()
+        self.service = service
+
+    def format(self, record):
+        entry = {
+            "ts": self.formatTime(record),
+            "level": record.levelname,
+            "service": self.service,
+            "logger": record.name,
+            "msg": record.getMessage(),
+        }
+        return json.dumps(entry)
+
+
+class TruncatingQueueHandler(QueueHandler):
+    """Enqueue records with the message formatted and capped in the calling thread."""
+    def __init__(self, log_queue, max_payload):
+        super().__init__(log_queue)
+        self.max_payload = max_payload
+
+    def prepare(self, record):
+        record = super().prepare(record)
+        record.msg = record.message = truncate(record.msg, self.max_payload)
+        return record
+
+
+def _level(value, default):
+    if not value:
+        return default
+    return int(value) if value.isdigit() else logging.getLevelName(value.upper())
+
+
+def configure_logging(service, level=None, log_dir=LOG_DIR, console=True):
+    """
+    Route all logging for a service through a queue, so request and trading threads
+    never block on console or disk writes. A background listener writes plain lines
+    to the console and JSON lines to <log_dir>/<service>.jsonl (rotated daily, 7 kept).
+
+    Per-service environment overrides (SERVICE is the upper-cased service name):
+      <SERVICE>_LOG_LEVEL        root level (falls back to LOG_LEVEL, DEBUG=1, then INFO)
+      <SERVICE>_LOG_LEVELS       per-logger levels, e.g. "werkzeug=WARNING,yfinance=ERROR"
+      <SERVICE>_LOG_MAX_PAYLOAD  message cap in characters (falls back to LOG_MAX_PAYLOAD)
+    Returns the started QueueListener.
+    """
+    prefix = service.upper()
+    default_level = logging.DEBUG if os.environ.get('DEBUG') == '1' else logging.INFO
+    level = level if level is not None else _level(
+        os.environ.get(f'{prefix}_LOG_LEVEL') or os.environ.get('LOG_LEVEL'), default_level)
+    max_payload = int(os.environ.get(f'{prefix}_LOG_MAX_PAYLOAD', LOG_MAX_PAYLOAD))
+
+    handlers = []
+    if console:
+        console_handler = logging.StreamHandler()
+        console_handler.setFormatter(logging.Formatter(CONSOLE_FORMAT))
+        handlers.append(console_handler)
+    if log_dir:
+        os.makedirs(log_dir, exist_ok=True)
+        file_handler = TimedRotatingFileHandler(os.path.join(log_dir, f'{service}.jsonl'), when='midnight',
+                                                backupCount=7, encoding='utf-8')
+        file_handler.setFormatter(JsonLineFormatter(service))
+        handlers.append(file_handler)
+
+    log_queue = queue.SimpleQueue()
+    root = logging.getLogger()
+    for handler in list(root.handlers):
+        root.removeHandler(handler)
+    root.addHandler(TruncatingQueueHandler(log_queue, max_payload))
+    root.setLevel(level)
+    for item in os.environ.get(f'{prefix}_LOG_LEVELS', '').split(','):
+        if '=' in item:
+            name, value = item.split('=', 1)
+            logging.getLogger(name.strip()).setLevel(_level(value.strip(), logging.NOTSET))
+
+    listener = QueueListener(log_queue, *handlers, respect_handler_level=True)
+    listener.start()
+    # Flush whatever is still queued when the process exits
+    atexit.register(_stop_listener, listener)
+    return listener
+
+
+def _stop_listener(listener):
+    # QueueListener.stop() fails if the listener was already stopped
+    if listener._thread is not None:
+        listener.stop()
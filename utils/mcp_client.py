@@ -1,16 +1,59 @@
 
+import os
+import threading
 import requests
 import json
+from utils.circuit_breaker import CircuitBreaker
+
+MCP_TIMEOUT_SECONDS = float(os.environ.get('MCP_TIMEOUT_SECONDS', 30))
+# Prompts the MCP server answers itself; everything else is forwarded to the LLM
+BOOKKEEPING_PROMPTS = ('RECORD_TRADES', 'GET_LATEST_TRADES', 'GET_PORTFOLIO_ANALYTICS', 'MARK_TRADES_VERIFIED')
+# Half-open breakers let this many requests through, enough for concurrent ensemble slots
+MCP_HALF_OPEN_PROBES = 8
 
 class MCPClient:
-    def __init__(self, mcp_url="http://localhost:11534/mcp"):
+    def __init__(self, mcp_url="http://localhost:11534/mcp", breaker=None, llm_breaker=None):
         self.mcp_url = mcp_url
+        # Only connection errors and timeouts trip these: a slow but answered LLM prompt or an
+        # HTTP error reply means the server is up. LLM prompts have their own breaker, so a
+        # struggling LLM never blocks trade bookkeeping.
+        self.breaker = breaker or CircuitBreaker.from_env('mcp', half_open_probes=MCP_HALF_OPEN_PROBES)
+        self.llm_breaker = llm_breaker or CircuitBreaker.from_env('mcp_llm', half_open_probes=MCP_HALF_OPEN_PROBES)
+        self._local = threading.local()
+
+    @property
+    def last_stale(self):
+        # Whether the last reply on this thread was a cached answer served while Ollama was down
+        return getattr(self._local, 'stale', False)
 
-    def send(self, prompt):
+    def send(self, prompt, model=None, options=None, timeout=MCP_TIMEOUT_SECONDS):
+        self._local.stale = False
+        payload = {"prompt": prompt}
+        # Optional overrides for prompts forwarded to the LLM
+        if model:
+            payload["model"] = model
+        if options:
+            payload["options"] = options
+        breaker = self.breaker if prompt.startswith(BOOKKEEPING_PROMPTS) else self.llm_breaker
+        if not breaker.allow():
+            print(f"MCP request skipped: {breaker.name} circuit open")
+            return ""
+        try:
+            response = requests.post(self.mcp_url, json=payload, timeout=timeout)
+        except (requests.ConnectionError, requests.Timeout) as e:
+            breaker.record(False)
+            print(f"MCP request failed: {e}")
+            return ""
+        except Exception as e:
+            breaker.record(True)
+            print(f"MCP request failed: {e}")
+            return ""
+        breaker.record(True)
         try:
-            response = requests.post(self.mcp_url, json={"prompt": prompt}, timeout=30)
             response.raise_for_status()
-            return response.json().get("result", "")
+            data = response.json()
+            self._local.stale = data.get("stale") is True
+            return data.get("result", "")
         except Exception as e:
             print(f"MCP request failed: {e}")
             return ""
@@ -21,3 +64,6 @@ class MCPClient:
 
     def get_latest_trades(self):
         return self.send("GET_LATEST_TRADES")
+
+    def get_portfolio_analytics(self):
+        return self.send("GET_PORTFOLIO_ANALYTICS")
@@ -7,15 +7,23 @@ import logging
 import json
 import csv
 import re
-from collections import defaultdict
-from utils.trade_log_utils import load_trade_log
+from utils.trade_log_utils import load_trade_log, save_trade_log
+from utils.trade_record import decode_tids, select_indices, group_indices
+from utils.log_config import configure_logging, summarize_prompt
+from utils.portfolio_analytics import load_analytics, latest_intraday_value
+from utils.circuit_breaker import CircuitBreaker, CircuitOpenError, StaleCache
 
 app = Flask(__name__)
-logging.basicConfig(level=logging.INFO)
 
 # Ollama API endpoint
 OLLAMA_URL = os.environ.get('OLLAMA_URL', 'http://localhost:11434/api/generate')
 OLLAMA_MODEL = os.environ.get('OLLAMA_MODEL', 'mistral')
+OLLAMA_TIMEOUT_SECONDS = float(os.environ.get('OLLAMA_TIMEOUT_SECONDS', 60))
+# How long a previous reply may stand in for Ollama while its circuit is open
+OLLAMA_STALE_SECONDS = float(os.environ.get('OLLAMA_STALE_SECONDS', 6 * 3600))
+# Trips on errors and timeouts only; a slow generation that finishes is a success
+ollama_breaker = CircuitBreaker.from_env('ollama')
+ollama_results = StaleCache(OLLAMA_STALE_SECONDS)
 
 log_dir = 'logging'
 os.makedirs(log_dir, exist_ok=True)
@@ -24,7 +32,7 @@ os.makedirs(log_dir, exist_ok=True)
 def mcp():
     data = request.get_json()
     prompt = data.get('prompt', '')
-    logging.info(f"Received prompt: {prompt}")
+    logging.info(f"Received prompt: {summarize_prompt(prompt)}")
 
     if prompt.startswith('RECORD_TRADES:'):
         # Just acknowledge, since agent logs trades to file
@@ -40,16 +48,23 @@ def mcp():
                 trade['verified'] = False
         return jsonify({'result': json.dumps(trades)})
 
+    elif prompt == 'GET_PORTFOLIO_ANALYTICS':
+        # Served from the state maintained by the trading agent, not recomputed from the log
+        snapshot = load_analytics(rebuild=False).snapshot()
+        intraday = latest_intraday_value()
+        if intraday is not None:
+            snapshot['intraday_ts'], snapshot['intraday_value'] = intraday
+        return jsonify({'result': json.dumps(snapshot)})
+
     elif prompt.startswith('MARK_TRADES_VERIFIED'):
         # Optionally support: MARK_TRADES_VERIFIED:transaction_id
         log_data = load_trade_log()
         trades = log_data.get('trades', [])
         parts = prompt.split(':')
         if len(parts) == 2:
-            up_to_id = parts[1]
-            for trade in trades:
-                if int(trade['transaction_id']) <= int(up_to_id):
-                    trade['verified'] = True
+            up_to_id = int(parts[1])
+            for i in select_indices(decode_tids(trades), end_tid=up_to_id):
+                trades[i]['verified'] = True
         else:
             for trade in trades:
                 trade['verified'] = True
@@ -58,60 +73,71 @@ def mcp():
         return jsonify({'result': 'trades marked as verified'}), 200
 
     else:
-        # Forward to Ollama
-        payload = {
-            'model': OLLAMA_MODEL,
-            'prompt': prompt
-        }
+        return forward_to_ollama(prompt, data.get('model') or OLLAMA_MODEL, data.get('options'))
+
+def query_ollama(prompt, model, options=None):
+    """Send a prompt to Ollama and return the JSON object in its reply, or None if there is none."""
+    payload = {
+        'model': model,
+        'prompt': prompt
+    }
+    if options:
+        payload['options'] = options
+    resp = requests.post(OLLAMA_URL, json=payload, timeout=OLLAMA_TIMEOUT_SECONDS)
+    resp.raise_for_status()
+    # Concatenate all 'response' fields from the streamed JSON lines
+    response_text = ""
+    lines = resp.text.strip().splitlines()
+    for line in lines:
         try:
-            resp = requests.post(OLLAMA_URL, json=payload, timeout=60)
-            resp.raise_for_status()
-            # Concatenate all 'response' fields from the streamed JSON lines
-            response_text = ""
-            lines = resp.text.strip().splitlines()
-            for line in lines:
-                try:
-                    obj = json.loads(line)
-                    if 'response' in obj:
-                        response_text += obj['response']
-                except Exception:
-                    continue
-            # Now try to extract JSON from the concatenated response_text
-            match = re.search(r'\{.*\}', response_text, re.DOTALL)
-            if match:
-                llm_result = match.group(0)
-                return jsonify({'result': llm_result})
-            else:
-                return jsonify({'result': 'llm error'}), 500
-        except Exception as e:
-            logging.error(f"Ollama request failed: {e}")
-            return jsonify({'result': 'llm error'}), 500
+            obj = json.loads(line)
+            if 'response' in obj:
+                response_text += obj['response']
+        except Exception:
+            continue
+    # Now try to extract JSON from the concatenated response_text
+    match = re.search(r'\{.*\}', response_text, re.DOTALL)
+    return match.group(0) if match else None
+
+def forward_to_ollama(prompt, model, options=None):
+    # While Ollama is failing, answer at once with the last good reply for this prompt
+    try:
+        llm_result = ollama_breaker.call(query_ollama, prompt, model, options)
+    except CircuitOpenError as e:
+        logging.warning(f"Ollama skipped: {e}")
+        llm_result = None
+    except Exception as e:
+        logging.error(f"Ollama request failed: {e}")
+        llm_result = None
+    else:
+        if llm_result:
+            ollama_results.put((model, prompt), llm_result)
+            return jsonify({'result': llm_result})
+    stale = ollama_results.get((model, prompt))
+    if stale:
+        logging.warning(f"Serving last good Ollama reply from {stale[1]:.0f}s ago")
+        return jsonify({'result': stale[0], 'stale': True, 'age_seconds': stale[1]})
+    return jsonify({'result': 'llm error'}), 500
 
 @app.route('/trades', methods=['GET'])
 def view_trades():
     log_data = load_trade_log()
     trades = log_data.get('trades', [])
-    # Group trades by transaction_id
-    transactions = defaultdict(list)
-    for trade in trades:
-        transactions[trade['transaction_id']].append(trade)
-    sorted_ids = sorted(transactions.keys(), key=lambda x: int(x))
+    # Group trades by numeric transaction_id
     # Compute total and delta per transaction
     transaction_summaries = []
     prev_total = None
-    for tid in sorted_ids:
-        batch = transactions[tid]
-        t_time = batch[0]['time']
-        t_date = batch[0]['date']
-        total = sum(trade['amount'] for trade in batch)
+    for tid, rows in group_indices(decode_tids(trades)).items():
+        first = trades[rows[0]]
+        total = sum(trades[i].get('amount', 0) for i in rows)
         delta = total - prev_total if prev_total is not None else None
         transaction_summaries.append({
-            'transaction_id': tid,
-            'time': t_time,
-            'date': t_date,
+            'transaction_id': f"{tid:05d}",
+            'time': first.get('time', ''),
+            'date': first.get('date', ''),
             'total': total,
             'delta': delta,
-            'trades': batch
+            'trades': [trades[i] for i in rows]
         })
         prev_total = total
     latest_total = transaction_summaries[-1]['total'] if transaction_summaries else 0
@@ -151,4 +177,5 @@ def view_trades():
     return render_template_string(html, transaction_summaries=transaction_summaries, latest_total=latest_total)
 
 if __name__ == '__main__':
+    configure_logging('mcp_server')
     app.run(host='0.0.0.0', port=11534) 
\ No newline at end of file
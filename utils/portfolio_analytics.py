@@ -0,0 +1,345 @@
+import os
+import json
+import math
+from collections import deque
+import numpy as np
+from utils.trade_log_utils import load_trade_log, TRADE_LOG_JSON
+from utils.price_store import PriceStore
+from utils.trade_record import decode_tids, group_indices, parse_timestamp
+
+LOG_DIR = 'logging'
+os.makedirs(LOG_DIR, exist_ok=True)
+ANALYTICS_STATE_JSON = os.environ.get('ANALYTICS_STATE_JSON', os.path.join(LOG_DIR, 'portfolio_analytics.json'))
+PORTFOLIO_VALUES_JSONL = os.environ.get('PORTFOLIO_VALUES_JSONL', os.path.join(LOG_DIR, 'portfolio_values.jsonl'))
+# Intraday value snapshots written by services/valuation_service.py
+VALUATION_STORE_DIR = os.environ.get('VALUATION_STORE_DIR', os.path.join(LOG_DIR, 'valuations'))
+VALUATION_SERIES = 'portfolio'
+ROLLING_WINDOW = int(os.environ.get('ANALYTICS_ROLLING_WINDOW', 30))
+# Returns are per transaction, so Sharpe is annualized by how many transactions fit in a
+# year, from the mean time between them in the rolling window. Setting
+# ANALYTICS_PERIODS_PER_YEAR fixes the count instead.
+_periods = os.environ.get('ANALYTICS_PERIODS_PER_YEAR')
+PERIODS_PER_YEAR = float(_periods) if _periods else None
+SECONDS_PER_YEAR = 365.25 * 86400
+# Used until two timestamped transactions are known (daily returns)
+DEFAULT_PERIODS_PER_YEAR = 252.0
+
+
+class PortfolioAnalytics:
+    """
+    Online portfolio analytics. Each committed transaction is folded into running
+    accumulators, so an update costs O(trades in the transaction) regardless of history.
+    """
+    def __init__(self, window=ROLLING_WINDOW, periods_per_year=PERIODS_PER_YEAR):
+        self.window = window
+        self.periods_per_year = periods_per_year
+        # symbol -> {"shares", "cost_basis", "last_price", "realized_pnl"}
+        self.positions = {}
+        self.cash = 0.0
+        self.value = None
+        self.peak_value = None
+        self.max_drawdown = 0.0
+        self.turnover = 0.0
+        self.last_transaction_id = 0
+        self.last_datetime = None
+        self.last_ts_ns = 0
+        # Newest valuation-service snapshot already folded into peak and drawdown
+        self.intraday_ts = 0
+        # Running totals kept in step with self.positions
+        self._market_value = 0.0
+        self._cost_basis = 0.0
+        self._realized_pnl = 0.0
+        # Rolling window of per-transaction returns with running sums, and the seconds
+        # since the previous transaction for each (None where a timestamp was missing)
+        self.returns = deque()
+        self._ret_sum = 0.0
+        self._ret_sumsq = 0.0
+        self.intervals = deque()
+        self._interval_sum = 0.0
+        self._interval_count = 0
+
+    def _position(self, symbol):
+        if symbol not in self.positions:
+            self.positions[symbol] = {"shares": 0.0, "cost_basis": 0.0, "last_price": None, "realized_pnl": 0.0}
+        return self.positions[symbol]
+
+    def _apply_trade(self, trade):
+        pos = self._position(trade['symbol'])
+        old_market = pos['shares'] * (pos['last_price'] or 0)
+        old_cost = pos['cost_basis']
+        price = trade.get('current_price')
+        if price is not None and price > 0:
+            pos['last_price'] = price
+        shares_changed = trade.get('shares_changed', 0) or 0
+        amount = trade.get('amount', 0) or 0
+        if shares_changed > 0:
+            pos['cost_basis'] += amount
+        elif shares_changed < 0 and pos['shares'] > 0:
+            sold = min(-shares_changed, pos['shares'])
+            avg_cost = pos['cost_basis'] / pos['shares']
+            realized = amount - sold * avg_cost
+            pos['realized_pnl'] += realized
+            self._realized_pnl += realized
+            pos['cost_basis'] -= sold * avg_cost
+        pos['shares'] = trade.get('shares_held', pos['shares'] + shares_changed) or 0.0
+        if pos['shares'] <= 1e-9:
+            pos['shares'] = 0.0
+            pos['cost_basis'] = 0.0
+        self.turnover += amount
+        self._market_value += pos['shares'] * (pos['last_price'] or 0) - old_market
+        self._cost_basis += pos['cost_basis'] - old_cost
+
+    def _push_return(self, ret, interval=None):
+        self.returns.append(ret)
+        self._ret_sum += ret
+        self._ret_sumsq += ret * ret
+        self.intervals.append(interval)
+        if interval is not None:
+            self._interval_sum += interval
+            self._interval_count += 1
+        if len(self.returns) > self.window:
+            old = self.returns.popleft()
+            self._ret_sum -= old
+            self._ret_sumsq -= old * old
+            old = self.intervals.popleft()
+            if old is not None:
+                self._interval_sum -= old
+                self._interval_count -= 1
+
+    def update(self, trades):
+        """
+        Fold one committed transaction (all rows share a transaction_id) into the state.
+        Returns False if the transaction was already applied.
+        """
+        if not trades:
+            return False
+        tid = int(trades[0]['transaction_id'])
+        if tid <= self.last_transaction_id:
+            return False
+        for trade in trades:
+            self._apply_trade(trade)
+        last = trades[-1]
+        self.cash = last.get('final_cash', last.get('cash', self.cash))
+        prev_value = self.value
+        self.value = self.cash + self._market_value
+        ts_ns = parse_timestamp(last.get('date'), last.get('time'))
+        if prev_value:
+            interval = None
+            if ts_ns and self.last_ts_ns and ts_ns > self.last_ts_ns:
+                interval = (ts_ns - self.last_ts_ns) / 1_000_000_000
+            self._push_return(self.value / prev_value - 1, interval)
+        self.last_ts_ns = ts_ns or self.last_ts_ns
+        if self.peak_value is None or self.value > self.peak_value:
+            self.peak_value = self.value
+        if self.peak_value and self.peak_value > 0:
+            self.max_drawdown = max(self.max_drawdown, (self.peak_value - self.value) / self.peak_value)
+        self.last_transaction_id = tid
+        self.last_datetime = f"{last.get('date', '')} {last.get('time', '')}".strip()
+        return True
+
+    def fold_intraday(self, records, until_ns=None):
+        """
+        Fold intraday value snapshots (ts, close records from the valuation service)
+        newer than the last folded one, and at most until_ns, into the running peak
+        and max drawdown. Returns and volatility stay per transaction. Returns the
+        number of snapshots folded.
+        """
+        ts = records['ts']
+        lo = int(np.searchsorted(ts, self.intraday_ts, side='right'))
+        hi = len(records) if until_ns is None else int(np.searchsorted(ts, until_ns, side='right'))
+        if hi <= lo:
+            return 0
+        values = np.asarray(records['close'][lo:hi], dtype='f8')
+        start = values[0] if self.peak_value is None else max(self.peak_value, values[0])
+        peaks = np.maximum.accumulate(np.concatenate([[start], values]))[1:]
+        positive = peaks > 0
+        if positive.any():
+            drawdowns = (peaks[positive] - values[positive]) / peaks[positive]
+            self.max_drawdown = max(self.max_drawdown, float(drawdowns.max()))
+        self.peak_value = float(peaks[-1])
+        self.intraday_ts = int(ts[hi - 1])
+        return hi - lo
+
+    def volatility(self):
+        n = len(self.returns)
+        if n < 2:
+            return 0.0
+        mean = self._ret_sum / n
+        var = max((self._ret_sumsq - n * mean * mean) / (n - 1), 0.0)
+        return math.sqrt(var)
+
+    def annualization(self):
+        """Return periods per year: fixed if configured, else from the mean transaction spacing."""
+        if self.periods_per_year:
+            return self.periods_per_year
+        if self._interval_count and self._interval_sum > 0:
+            return SECONDS_PER_YEAR / (self._interval_sum / self._interval_count)
+        return DEFAULT_PERIODS_PER_YEAR
+
+    def sharpe(self):
+        vol = self.volatility()
+        if vol == 0:
+            return 0.0
+        mean = self._ret_sum / len(self.returns)
+        return mean / vol * math.sqrt(self.annualization())
+
+    def snapshot(self):
+        symbols = {}
+        for symbol, pos in self.positions.items():
+            market_value = pos['shares'] * (pos['last_price'] or 0)
+            symbols[symbol] = {
+                "shares": pos['shares'],
+                "last_price": pos['last_price'],
+                "market_value": market_value,
+                "cost_basis": pos['cost_basis'],
+                "realized_pnl": pos['realized_pnl'],
+                "unrealized_pnl": market_value - pos['cost_basis'] if pos['shares'] else 0.0,
+            }
+        drawdown = 0.0
+        if self.peak_value and self.value is not None:
+            drawdown = (self.peak_value - self.value) / self.peak_value
+        return {
+            "transaction_id": self.last_transaction_id,
+            "datetime": self.last_datetime,
+            "portfolio_value": self.value or 0.0,
+            "cash": self.cash,
+            "market_value": self._market_value,
+            "realized_pnl": self._realized_pnl,
+            "unrealized_pnl": self._market_value - self._cost_basis,
+            "drawdown": drawdown,
+            "max_drawdown": self.max_drawdown,
+            "volatility": self.volatility(),
+            "sharpe": self.sharpe(),
+            "periods_per_year": self.annualization(),
+            "turnover": self.turnover,
+            "observations": len(self.returns),
+            "symbols": symbols,
+        }
+
+    def to_dict(self):
+        return {
+            "window": self.window,
+            "positions": self.positions,
+            "cash": self.cash,
+            "value": self.value,
+            "peak_value": self.peak_value,
+            "max_drawdown": self.max_drawdown,
+            "turnover": self.turnover,
+            "realized_pnl": self._realized_pnl,
+            "last_transaction_id": self.last_transaction_id,
+            "last_datetime": self.last_datetime,
+            "last_ts_ns": self.last_ts_ns,
+            "intraday_ts": self.intraday_ts,
+            "returns": list(self.returns),
+            "intervals": list(self.intervals),
+        }
+
+    @classmethod
+    def from_dict(cls, data):
+        # periods_per_year is configuration, not state: older files stored a fixed 252
+        analytics = cls(window=data.get('window', ROLLING_WINDOW))
+        analytics.positions = data.get('positions', {})
+        analytics.cash = data.get('cash', 0.0)
+        analytics.value = data.get('value')
+        analytics.peak_value = data.get('peak_value')
+        analytics.max_drawdown = data.get('max_drawdown', 0.0)
+        analytics.turnover = data.get('turnover', 0.0)
+        analytics._realized_pnl = data.get('realized_pnl', 0.0)
+        analytics.last_transaction_id = data.get('last_transaction_id', 0)
+        analytics.last_datetime = data.get('last_datetime')
+        analytics.intraday_ts = data.get('intraday_ts', 0)
+        analytics.last_ts_ns = data.get('last_ts_ns') or parse_timestamp(*(analytics.last_datetime or ' ').split(' ', 1))
+        for pos in analytics.positions.values():
+            analytics._market_value += pos['shares'] * (pos['last_price'] or 0)
+            analytics._cost_basis += pos['cost_basis']
+        returns = data.get('returns', [])
+        # State saved before intervals were tracked has none
+        intervals = data.get('intervals') or [None] * len(returns)
+        for ret, interval in zip(returns, intervals):
+            analytics._push_return(ret, interval)
+        return analytics
+
+
+def group_transactions(trades):
+    """Group trade rows into transaction batches ordered by transaction_id."""
+    return [[trades[i] for i in rows] for rows in group_indices(decode_tids(trades)).values()]
+
+
+def append_value_point(analytics, values_path=PORTFOLIO_VALUES_JSONL):
+    """Append the latest portfolio value as one JSON line."""
+    point = {
+        "transaction_id": analytics.last_transaction_id,
+        "datetime": analytics.last_datetime,
+        "value": analytics.value,
+    }
+    with open(values_path, 'a') as f:
+        f.write(json.dumps(point) + "\n")
+
+
+def load_value_history(values_path=PORTFOLIO_VALUES_JSONL):
+    """Load the per-transaction portfolio value series."""
+    if not os.path.exists(values_path):
+        return []
+    points = []
+    with open(values_path, 'r') as f:
+        for line in f:
+            try:
+                points.append(json.loads(line))
+            except ValueError:
+                continue
+    return points
+
+
+def load_intraday_values(start=None, end=None, store_dir=VALUATION_STORE_DIR):
+    """Memory-mapped (ts_ns, value) snapshots between rebalances."""
+    return PriceStore(store_dir).read_range(VALUATION_SERIES, start, end)
+
+
+def latest_intraday_value(store_dir=VALUATION_STORE_DIR):
+    """Return (ts_ns, value) of the newest intraday snapshot, or None."""
+    return PriceStore(store_dir).latest(VALUATION_SERIES)
+
+
+def save_analytics(analytics, state_path=ANALYTICS_STATE_JSON):
+    """Atomically persist the accumulator state so readers never see a partial file."""
+    tmp_path = state_path + '.tmp'
+    with open(tmp_path, 'w') as f:
+        json.dump(analytics.to_dict(), f)
+    os.replace(tmp_path, state_path)
+
+
+def rebuild_analytics(trades, state_path=ANALYTICS_STATE_JSON, values_path=PORTFOLIO_VALUES_JSONL,
+                      store_dir=VALUATION_STORE_DIR):
+    """
+    Replay the full trade log once to (re)create the analytics state and value series,
+    folding in the intraday snapshots taken before each transaction.
+    """
+    analytics = PortfolioAnalytics()
+    if os.path.exists(values_path):
+        os.remove(values_path)
+    intraday = load_intraday_values(store_dir=store_dir)
+    for batch in group_transactions(trades):
+        # A batch without a timestamp folds nothing; its snapshots count toward the next one
+        analytics.fold_intraday(intraday, parse_timestamp(batch[-1].get('date'), batch[-1].get('time')))
+        if analytics.update(batch):
+            append_value_point(analytics, values_path)
+    save_analytics(analytics, state_path)
+    return analytics
+
+
+def load_analytics(state_path=ANALYTICS_STATE_JSON, values_path=PORTFOLIO_VALUES_JSONL, rebuild=True,
+                   log_path=TRADE_LOG_JSON, store_dir=VALUATION_STORE_DIR):
+    """
+    Load the maintained analytics state. If it is missing and rebuild is set,
+    bootstrap it from the trade log at log_path.
+    """
+    if os.path.exists(state_path):
+        try:
+            with open(state_path, 'r') as f:
+                return PortfolioAnalytics.from_dict(json.load(f))
+        except Exception:
+            pass
+    if not rebuild:
+        return PortfolioAnalytics()
+    return rebuild_analytics(load_trade_log(log_path, include_archive=True)["trades"], state_path, values_path,
+                             store_dir)
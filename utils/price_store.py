@@ -0,0 +1,247 @@
+import os
+import argparse
+import csv
+import logging
+import re
+import time
+from contextlib import contextmanager
+from datetime import datetime
+import numpy as np
+try:
+    import fcntl
+except ImportError:  # Windows: writers are not serialized across processes
+    fcntl = None
+
+LOG_DIR = 'logging'
+PRICE_STORE_DIR = os.environ.get('PRICE_STORE_DIR', os.path.join(LOG_DIR, 'prices'))
+PRICE_FIXTURES_DIR = os.environ.get('PRICE_FIXTURES_DIR', os.path.join('fixtures', 'prices'))
+
+# One fixed-size record per observation, stored back to back in <symbol>.bin
+PRICE_DTYPE = np.dtype([('ts', '<i8'), ('close', '<f8')])
+EMPTY = np.zeros(0, dtype=PRICE_DTYPE)
+
+
+# Nanoseconds per epoch unit, and the magnitude below which a bare number is taken to be in
+# that unit: seconds up to year 5138, then ms, us, and ns for anything larger
+EPOCH_UNITS = {'s': 1_000_000_000, 'ms': 1_000_000, 'us': 1_000, 'ns': 1}
+EPOCH_UNIT_LIMITS = ((10**11, 's'), (10**14, 'ms'), (10**17, 'us'))
+
+
+def to_ns(value, unit=None):
+    """
+    Convert a datetime, pandas Timestamp or epoch number to epoch nanoseconds.
+    Epoch numbers are in `unit` ('s', 'ms', 'us' or 'ns'); without one, the unit is
+    inferred from the magnitude, so epoch ms (~1.7e12) is not mistaken for ns.
+    """
+    if value is None:
+        return None
+    if hasattr(value, 'value') and not isinstance(value, (int, float)):
+        return int(value.value)  # pandas Timestamp
+    if isinstance(value, datetime):
+        return int(value.timestamp() * 1_000_000_000)
+    if unit is None:
+        unit = next((u for limit, u in EPOCH_UNIT_LIMITS if abs(value) < limit), 'ns')
+    if unit not in EPOCH_UNITS:
+        raise ValueError(f"Unknown epoch unit: {unit}")
+    # Integers are scaled exactly; floats keep their fraction (e.g. time.time())
+    if isinstance(value, float):
+        return int(round(value * EPOCH_UNITS[unit]))
+    return int(value) * EPOCH_UNITS[unit]
+
+
+class PriceStore:
+    """
+    Per-symbol columnar price history backed by flat binary files.
+    Reads are memory-mapped, so range queries return views without copying.
+    Writers in any process serialize on an flock of <symbol>.lock, so an append
+    never races a merge rewrite; readers take no lock.
+    """
+    def __init__(self, root=PRICE_STORE_DIR):
+        self.root = root
+        os.makedirs(self.root, exist_ok=True)
+        self._maps = {}
+
+    def _path(self, symbol):
+        safe = re.sub(r'[^A-Za-z0-9._-]', '_', symbol)
+        return os.path.join(self.root, f"{safe}.bin")
+
+    @contextmanager
+    def _locked(self, symbol):
+        # A separate lock file: the data file's inode changes on every rewrite
+        with open(self._path(symbol)[:-4] + '.lock', 'a') as f:
+            if fcntl:
+                fcntl.flock(f, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                if fcntl:
+                    fcntl.flock(f, fcntl.LOCK_UN)
+
+    def symbols(self):
+        return sorted(name[:-4] for name in os.listdir(self.root) if name.endswith('.bin'))
+
+    def read(self, symbol):
+        """Return the full history for a symbol as a read-only memory-mapped record array."""
+        path = self._path(symbol)
+        try:
+            st = os.stat(path)
+        except FileNotFoundError:
+            return EMPTY
+        if st.st_size < PRICE_DTYPE.itemsize:
+            return EMPTY
+        key = (st.st_ino, st.st_size)
+        cached = self._maps.get(symbol)
+        if cached is not None and cached[0] == key:
+            return cached[1]
+        data = np.memmap(path, dtype=PRICE_DTYPE, mode='r', shape=(st.st_size // PRICE_DTYPE.itemsize,))
+        self._maps[symbol] = (key, data)
+        return data
+
+    def read_range(self, symbol, start=None, end=None):
+        """
+        Return records with start <= ts <= end as a zero-copy slice of the mapped file.
+        Bounds are epoch ns or datetimes.
+        """
+        data = self.read(symbol)
+        if not len(data):
+            return data
+        ts = data['ts']
+        lo = 0 if start is None else int(np.searchsorted(ts, to_ns(start, unit='ns'), side='left'))
+        hi = len(data) if end is None else int(np.searchsorted(ts, to_ns(end, unit='ns'), side='right'))
+        return data[lo:hi]
+
+    def latest(self, symbol):
+        """Return (ts_ns, close) of the newest record, or None."""
+        data = self.read(symbol)
+        if not len(data):
+            return None
+        return int(data['ts'][-1]), float(data['close'][-1])
+
+    def append(self, symbol, ts, close):
+        """
+        Append one or more observations. Timestamps are epoch ns or datetimes; callers
+        holding other epoch units convert them with to_ns first, so nothing is scaled twice.
+        In-order data is appended to the file; anything older than the last stored
+        timestamp is merged with a rewrite.
+        """
+        records = np.zeros(np.size(ts), dtype=PRICE_DTYPE)
+        records['ts'] = np.atleast_1d([to_ns(t, unit='ns') for t in np.atleast_1d(ts)])
+        records['close'] = np.atleast_1d(close)
+        records = records[np.isfinite(records['close'])]
+        if not len(records):
+            return 0
+        records = np.sort(records, order='ts')
+        with self._locked(symbol):
+            # Checked under the lock: another process may have written since
+            last = self.latest(symbol)
+            if last is not None and records['ts'][0] <= last[0]:
+                return self._merge(symbol, records)
+            with open(self._path(symbol), 'ab') as f:
+                f.write(records.tobytes())
+        return len(records)
+
+    def write(self, symbol, records):
+        """Merge records into the stored history, keeping one row per timestamp (newest wins)."""
+        with self._locked(symbol):
+            return self._merge(symbol, records)
+
+    def _merge(self, symbol, records):
+        merged = np.concatenate([records, np.array(self.read(symbol))])
+        # np.unique keeps the first occurrence, and the new records come first
+        _, idx = np.unique(merged['ts'], return_index=True)
+        merged = merged[idx]
+        path = self._path(symbol)
+        tmp_path = path + '.tmp'
+        with open(tmp_path, 'wb') as f:
+            f.write(merged.tobytes())
+        os.replace(tmp_path, path)
+        self._maps.pop(symbol, None)
+        return len(records)
+
+    def is_fresh(self, symbol, max_age_seconds):
+        last = self.latest(symbol)
+        if last is None:
+            return False
+        return time.time_ns() - last[0] <= max_age_seconds * 1_000_000_000
+
+
+def ingest_yfinance(store, symbols, period='1mo', interval='1d'):
+    """Download closing prices for symbols from yfinance into the store."""
+    import yfinance as yf
+    counts = {}
+    for symbol in symbols:
+        history = yf.Ticker(symbol).history(period=period, interval=interval)
+        if history is None or history.empty:
+            raise ValueError(f"No price data returned for {symbol}")
+        closes = history['Close'].dropna()
+        counts[symbol] = store.append(symbol, [to_ns(ts) for ts in closes.index], closes.to_numpy(dtype='f8'))
+    return counts
+
+
+def ingest_csv(store, path, symbol=None):
+    """
+    Load prices from a CSV file. Accepts yfinance exports (Date/Datetime, Close)
+    or rows of symbol,timestamp,close.
+    """
+    rows = {}
+    default_symbol = symbol or os.path.splitext(os.path.basename(path))[0]
+    with open(path, newline='') as f:
+        for row in csv.DictReader(f):
+            row = {k.strip().lower(): v for k, v in row.items() if k}
+            stamp = row.get('timestamp') or row.get('datetime') or row.get('date')
+            close = row.get('close')
+            if not stamp or close in (None, ''):
+                continue
+            try:
+                ts = int(stamp)
+            except ValueError:
+                ts = datetime.fromisoformat(stamp.strip())
+            rows.setdefault(row.get('symbol') or default_symbol, []).append((to_ns(ts), float(close)))
+    counts = {}
+    for sym, points in rows.items():
+        ts, close = zip(*points)
+        counts[sym] = store.append(sym, list(ts), list(close))
+    return counts
+
+
+def ingest(symbols, store=None, period='1mo', interval='1d', fixtures_dir=PRICE_FIXTURES_DIR, offline=False):
+    """Ingest from yfinance when online, falling back to <fixtures_dir>/<symbol>.csv offline."""
+    store = store or PriceStore()
+    counts = {}
+    for symbol in symbols:
+        if not offline:
+            try:
+                counts.update(ingest_yfinance(store, [symbol], period=period, interval=interval))
+                continue
+            except Exception as e:
+                logging.warning(f"yfinance ingest failed for {symbol}, trying fixtures: {e}")
+        fixture = os.path.join(fixtures_dir, f"{symbol}.csv")
+        if os.path.exists(fixture):
+            counts.update(ingest_csv(store, fixture, symbol=symbol))
+        else:
+            logging.warning(f"No price source available for {symbol}")
+    return counts
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Ingest price history into the local price store.")
+    parser.add_argument('symbols', nargs='*', help="Symbols to ingest")
+    parser.add_argument('--period', default='1mo')
+    parser.add_argument('--interval', default='1d')
+    parser.add_argument('--csv', help="Ingest a CSV file instead of downloading")
+    parser.add_argument('--fixtures-dir', default=PRICE_FIXTURES_DIR)
+    parser.add_argument('--offline', action='store_true', help="Only use CSV fixtures")
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.INFO)
+    store = PriceStore()
+    if args.csv:
+        counts = ingest_csv(store, args.csv, symbol=args.symbols[0] if args.symbols else None)
+    else:
+        counts = ingest(args.symbols, store, period=args.period, interval=args.interval,
+                        fixtures_dir=args.fixtures_dir, offline=args.offline)
+    for symbol, count in counts.items():
+        print(f"{symbol}: {count} records")
+
+
+if __name__ == '__main__':
+    main()
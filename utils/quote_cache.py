@@ -0,0 +1,174 @@
+import os
+import time
+import mmap
+import zlib
+import struct
+import logging
+import threading
+try:
+    import fcntl
+except ImportError:  # Windows: writers are only serialized within a process
+    fcntl = None
+
+QUOTE_CACHE_PATH = os.environ.get('QUOTE_CACHE_PATH', os.path.join('logging', 'quote_cache.bin'))
+# Fixed number of slots; one symbol per slot, never evicted
+QUOTE_CACHE_SLOTS = int(os.environ.get('QUOTE_CACHE_SLOTS', 4096))
+
+MAGIC = b'QCACHE01'
+HEADER = struct.Struct('<8sII')
+HEADER_SIZE = 64
+# seq, symbol, price, epoch-ns timestamp
+SLOT = struct.Struct('<Q24sdq')
+SEQ = struct.Struct('<Q')
+MAX_SYMBOL_BYTES = 24
+# A reader retries this often while a writer is mid-update before giving up on the slot
+READ_RETRIES = 100
+
+
+class QuoteCache:
+    """
+    Latest quote per symbol in a memory-mapped file shared by every service on the host.
+    Slots are found by hashing the symbol (linear probing) and each slot is guarded by
+    a seqlock: the writer makes the sequence odd, writes, then makes it even again, and
+    readers retry if the sequence was odd or changed while they read. Readers never
+    take a lock; writers serialize on an flock of the file.
+    """
+    def __init__(self, path=QUOTE_CACHE_PATH, slots=QUOTE_CACHE_SLOTS):
+        self.path = path
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self.fd = os.open(path, os.O_RDWR | os.O_CREAT, 0o644)
+        self._lock = threading.Lock()
+        with self._writer():
+            if os.fstat(self.fd).st_size < HEADER_SIZE:
+                os.ftruncate(self.fd, HEADER_SIZE + slots * SLOT.size)
+                os.pwrite(self.fd, HEADER.pack(MAGIC, slots, SLOT.size), 0)
+            magic, self.slots, slot_size = HEADER.unpack(os.pread(self.fd, HEADER.size, 0))
+        if magic != MAGIC or slot_size != SLOT.size:
+            os.close(self.fd)
+            raise ValueError(f"{path} is not a quote cache file")
+        self.mm = mmap.mmap(self.fd, HEADER_SIZE + self.slots * SLOT.size)
+        # Slots never move, so each process remembers where it found a symbol
+        self._index = {}
+
+    def _writer(self):
+        return _WriterLock(self)
+
+    def _offset(self, i):
+        return HEADER_SIZE + i * SLOT.size
+
+    def _read_slot(self, offset):
+        mm = self.mm
+        for _ in range(READ_RETRIES):
+            seq, symbol, price, ts = SLOT.unpack_from(mm, offset)
+            if not seq & 1 and SEQ.unpack_from(mm, offset)[0] == seq:
+                return symbol, price, ts
+        return None
+
+    def _find(self, key, claim=False):
+        """Offset of the slot holding key; with claim, the first empty slot on its probe path."""
+        offset = self._index.get(key)
+        if offset is not None:
+            return offset
+        start = zlib.crc32(key) % self.slots
+        for probe in range(self.slots):
+            offset = self._offset((start + probe) % self.slots)
+            slot = self._read_slot(offset)
+            if slot is None:
+                continue
+            symbol = slot[0].rstrip(b'\0')
+            if symbol == key:
+                self._index[key] = offset
+                return offset
+            if not symbol:
+                return offset if claim else None
+        return None
+
+    def get(self, symbol):
+        """(price, ts_ns) for symbol, or None if it was never cached."""
+        key = symbol.encode()
+        if len(key) > MAX_SYMBOL_BYTES:
+            return None
+        offset = self._find(key)
+        if offset is None:
+            return None
+        slot = self._read_slot(offset)
+        if slot is None:
+            return None
+        return slot[1], slot[2]
+
+    def get_fresh(self, symbol, max_age_seconds):
+        """Cached price if it is at most max_age_seconds old, else None."""
+        quote = self.get(symbol)
+        if quote is None or time.time_ns() - quote[1] > max_age_seconds * 1_000_000_000:
+            return None
+        return quote[0]
+
+    def put(self, symbol, price, ts_ns=None):
+        """Store a quote. Returns False if the cache is full or the symbol is too long for a slot."""
+        return self.put_many({symbol: price}, ts_ns) == 1
+
+    def put_many(self, quotes, ts_ns=None):
+        """
+        Store {symbol: price} under one lock. Returns the number stored; symbols longer
+        than MAX_SYMBOL_BYTES are skipped and logged, so callers keep their other quotes.
+        """
+        ts_ns = time.time_ns() if ts_ns is None else ts_ns
+        stored = 0
+        with self._writer():
+            for symbol, price in quotes.items():
+                key = symbol.encode()
+                if len(key) > MAX_SYMBOL_BYTES:
+                    logging.warning(f"Skipping {symbol}: longer than {MAX_SYMBOL_BYTES} bytes, not cached")
+                    continue
+                offset = self._find(key, claim=True)
+                if offset is None:
+                    continue
+                seq = SEQ.unpack_from(self.mm, offset)[0]
+                SEQ.pack_into(self.mm, offset, seq + 1)
+                SLOT.pack_into(self.mm, offset, seq + 1, key, float(price), ts_ns)
+                SEQ.pack_into(self.mm, offset, seq + 2)
+                self._index[key] = offset
+                stored += 1
+        return stored
+
+    def items(self):
+        """All cached quotes as {symbol: (price, ts_ns)}."""
+        quotes = {}
+        for i in range(self.slots):
+            slot = self._read_slot(self._offset(i))
+            if slot and slot[0].rstrip(b'\0'):
+                quotes[slot[0].rstrip(b'\0').decode()] = (slot[1], slot[2])
+        return quotes
+
+    def close(self):
+        self.mm.close()
+        os.close(self.fd)
+
+
+class _WriterLock:
+    # Thread lock for this process, flock for the others
+    def __init__(self, cache):
+        self.cache = cache
+
+    def __enter__(self):
+        self.cache._lock.acquire()
+        if fcntl:
+            fcntl.flock(self.cache.fd, fcntl.LOCK_EX)
+
+    def __exit__(self, *exc):
+        if fcntl:
+            fcntl.flock(self.cache.fd, fcntl.LOCK_UN)
+        self.cache._lock.release()
+
+
+_shared = None
+
+
+def get_quote_cache():
+    """Process-wide QuoteCache at QUOTE_CACHE_PATH, opened on first use."""
+    global _shared
+    if _shared is None:
+        _shared = QuoteCache()
+    return _shared
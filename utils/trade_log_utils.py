@@ -1,37 +1,50 @@
 import os
 import json
+import gzip
+from datetime import datetime, date as date_type
+from collections import OrderedDict
 
 LOG_DIR = 'logging'
 os.makedirs(LOG_DIR, exist_ok=True)
 TRADE_LOG_JSON = os.environ.get('TRADE_LOG_JSON', os.path.join(LOG_DIR, 'trade_log.json'))
+# Transactions kept in the hot log; older verified ones are rolled into compressed archive
+# segments once the hot log holds twice this many.
+TRADE_LOG_HOT_TRANSACTIONS = int(os.environ.get('TRADE_LOG_HOT_TRANSACTIONS', 100))
+# Maximum trades per archive segment (segments are also split by trade date)
+TRADE_LOG_SEGMENT_MAX_TRADES = int(os.environ.get('TRADE_LOG_SEGMENT_MAX_TRADES', 5000))
 
 
-def load_trade_log(log_path=TRADE_LOG_JSON):
+def load_trade_log(log_path=TRADE_LOG_JSON, include_archive=False):
     """
     Load the trade log from JSON file, migrating legacy list format to dict if needed.
     Always returns a dict with 'new_trade' and 'trades' keys.
+    Only the hot window is returned unless include_archive is set.
     """
     if not os.path.exists(log_path):
-        return {"new_trade": False, "trades": []}
-    try:
-        with open(log_path, 'r') as f:
-            data = json.load(f)
-        # If it's a list, migrate to dict format
-        if isinstance(data, list):
-            data = {"new_trade": False, "trades": data}
-            with open(log_path, 'w') as f:
-                json.dump(data, f, indent=2)
-        # If it's empty or missing keys, reset
-        if not isinstance(data, dict) or "trades" not in data:
+        data = {"new_trade": False, "trades": []}
+    else:
+        try:
+            with open(log_path, 'r') as f:
+                data = json.load(f)
+            # If it's a list, migrate to dict format
+            if isinstance(data, list):
+                data = {"new_trade": False, "trades": data}
+                with open(log_path, 'w') as f:
+                    json.dump(data, f, indent=2)
+            # If it's empty or missing keys, reset
+            if not isinstance(data, dict) or "trades" not in data:
+                data = {"new_trade": False, "trades": []}
+        except Exception:
             data = {"new_trade": False, "trades": []}
-        return data
-    except Exception:
-        return {"new_trade": False, "trades": []}
+    if include_archive:
+        data["trades"] = load_archived_trades(log_path=log_path) + data["trades"]
+    return data
 
 
 def save_trade_log(log_data, log_path=TRADE_LOG_JSON):
     """
     Save the trade log to JSON file, ensuring correct format.
+    Old transactions are rolled into the archive first, so the hot file stays small.
     """
     if not isinstance(log_data, dict):
         log_data = {"new_trade": False, "trades": []}
@@ -40,5 +53,158 @@ def save_trade_log(log_data, log_path=TRADE_LOG_JSON):
     if "new_trade" not in log_data:
         log_data["new_trade"] = False
     os.makedirs(os.path.dirname(log_path), exist_ok=True)
+    roll_trade_log(log_data, log_path)
     with open(log_path, 'w') as f:
-        json.dump(log_data, f, indent=2) 
\ No newline at end of file
+        json.dump(log_data, f, indent=2)
+
+
+def archive_dir(log_path=TRADE_LOG_JSON):
+    return os.path.join(os.path.dirname(log_path), 'archive')
+
+
+def _iso_date(value):
+    # Trades carry dates as %d-%m-%y; the manifest uses sortable YYYY-MM-DD
+    if isinstance(value, date_type):
+        return value.strftime('%Y-%m-%d')
+    try:
+        return datetime.strptime(value, '%d-%m-%y').strftime('%Y-%m-%d')
+    except (TypeError, ValueError):
+        return value or ''
+
+
+def load_manifest(log_path=TRADE_LOG_JSON):
+    """
+    Load the archive index: one entry per segment with its file name, transaction_id
+    range, date range and trade count.
+    """
+    path = os.path.join(archive_dir(log_path), 'manifest.json')
+    if not os.path.exists(path):
+        return {"segments": []}
+    with open(path, 'r') as f:
+        return json.load(f)
+
+
+def _save_manifest(manifest, log_path):
+    path = os.path.join(archive_dir(log_path), 'manifest.json')
+    tmp_path = path + '.tmp'
+    with open(tmp_path, 'w') as f:
+        json.dump(manifest, f, indent=2)
+    os.replace(tmp_path, path)
+
+
+def _write_segment(trades, log_path):
+    directory = archive_dir(log_path)
+    first_tid = int(trades[0]['transaction_id'])
+    last_tid = int(trades[-1]['transaction_id'])
+    day = _iso_date(trades[0].get('date'))
+    name = f"trades-{day}-{first_tid:05d}-{last_tid:05d}.json.gz"
+    # Never overwrite an existing segment
+    n = 1
+    while os.path.exists(os.path.join(directory, name)):
+        n += 1
+        name = f"trades-{day}-{first_tid:05d}-{last_tid:05d}-{n}.json.gz"
+    with gzip.open(os.path.join(directory, name), 'wt', encoding='utf-8') as f:
+        json.dump(trades, f)
+    return {
+        "file": name,
+        "first_tid": first_tid,
+        "last_tid": last_tid,
+        "first_date": day,
+        "last_date": _iso_date(trades[-1].get('date')),
+        "count": len(trades),
+    }
+
+
+def roll_trade_log(log_data, log_path=TRADE_LOG_JSON, hot_transactions=TRADE_LOG_HOT_TRANSACTIONS,
+                   segment_max_trades=TRADE_LOG_SEGMENT_MAX_TRADES):
+    """
+    Move verified transactions older than the newest hot_transactions into gzip segments,
+    split by trade date and holding about segment_max_trades each. Only the oldest run of
+    fully verified transactions is rolled, so GET_LATEST_TRADES and MARK_TRADES_VERIFIED
+    still see everything not yet verified. A transaction is never split across segments.
+    Rolls only once the hot log holds twice the window, so segments are written in
+    batches rather than on every save. Returns the number of trades archived.
+    """
+    trades = log_data["trades"]
+    by_tid = OrderedDict()
+    for trade in trades:
+        by_tid.setdefault(trade['transaction_id'], []).append(trade)
+    if len(by_tid) <= 2 * hot_transactions:
+        return 0
+    cold_tids = set()
+    for tid in list(by_tid)[:-hot_transactions]:
+        if not all(t.get('verified') for t in by_tid[tid]):
+            break
+        cold_tids.add(tid)
+    if not cold_tids:
+        return 0
+    log_data["trades"] = [t for t in trades if t['transaction_id'] not in cold_tids]
+    os.makedirs(archive_dir(log_path), exist_ok=True)
+    # Whole transactions, grouped by date, then packed into segments
+    by_date = OrderedDict()
+    for tid, tx_trades in by_tid.items():
+        if tid in cold_tids:
+            by_date.setdefault(_iso_date(tx_trades[0].get('date')), []).append(tx_trades)
+    manifest = load_manifest(log_path)
+    archived = 0
+    for transactions in by_date.values():
+        segment = []
+        for tx_trades in transactions:
+            if segment and len(segment) + len(tx_trades) > segment_max_trades:
+                manifest["segments"].append(_write_segment(segment, log_path))
+                segment = []
+            segment.extend(tx_trades)
+            archived += len(tx_trades)
+        if segment:
+            manifest["segments"].append(_write_segment(segment, log_path))
+    _save_manifest(manifest, log_path)
+    return archived
+
+
+def load_archived_trades(start_tid=None, end_tid=None, start_date=None, end_date=None, log_path=TRADE_LOG_JSON):
+    """
+    Read archived trades in the given transaction_id / date range (inclusive).
+    Dates may be datetime.date objects or YYYY-MM-DD strings. Only the segments
+    whose manifest range overlaps the query are opened.
+    """
+    start_date = _iso_date(start_date) if start_date else None
+    end_date = _iso_date(end_date) if end_date else None
+    trades = []
+    for segment in load_manifest(log_path)["segments"]:
+        if start_tid is not None and segment["last_tid"] < int(start_tid):
+            continue
+        if end_tid is not None and segment["first_tid"] > int(end_tid):
+            continue
+        if start_date and segment["last_date"] < start_date:
+            continue
+        if end_date and segment["first_date"] > end_date:
+            continue
+        with gzip.open(os.path.join(archive_dir(log_path), segment["file"]), 'rt', encoding='utf-8') as f:
+            trades.extend(json.load(f))
+    return _filter_trades(trades, start_tid, end_tid, start_date, end_date)
+
+
+def _filter_trades(trades, start_tid=None, end_tid=None, start_date=None, end_date=None):
+    result = []
+    for trade in trades:
+        tid = int(trade['transaction_id'])
+        day = _iso_date(trade.get('date'))
+        if start_tid is not None and tid < int(start_tid):
+            continue
+        if end_tid is not None and tid > int(end_tid):
+            continue
+        if start_date and day < start_date:
+            continue
+        if end_date and day > end_date:
+            continue
+        result.append(trade)
+    return result
+
+
+def load_trade_range(start_tid=None, end_tid=None, start_date=None, end_date=None, log_path=TRADE_LOG_JSON):
+    """Trades in a transaction_id / date range across the archive and the hot log."""
+    start_date = _iso_date(start_date) if start_date else None
+    end_date = _iso_date(end_date) if end_date else None
+    archived = load_archived_trades(start_tid, end_tid, start_date, end_date, log_path)
+    hot = _filter_trades(load_trade_log(log_path)["trades"], start_tid, end_tid, start_date, end_date)
+    return archived + hot
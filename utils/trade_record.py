@@ -0,0 +1,137 @@
+import sys
+import math
+from array import array
+from collections import OrderedDict
+from datetime import datetime
+from functools import lru_cache
+
+# Legacy trade rows store the timestamp as two strings in these formats
+DATE_FORMAT = "%d-%m-%y"
+TIME_FORMAT = "%H:%M:%S"
+NAN = float('nan')
+
+FLOAT_FIELDS = ('shares_changed', 'shares_held', 'price', 'amount', 'allocation', 'cash', 'portfolio_value', 'final_cash')
+# Legacy key for each float field where the names differ
+LEGACY_KEYS = {'price': 'current_price'}
+# Value used when a legacy row lacks a float field (NaN if not listed)
+FLOAT_DEFAULTS = {'shares_changed': 0.0, 'shares_held': 0.0, 'amount': 0.0, 'allocation': 0.0}
+# Keys that legacy rows may omit entirely; NaN means "absent" and is dropped on the way out
+OPTIONAL_FIELDS = ('cash', 'portfolio_value', 'final_cash')
+KNOWN_KEYS = {'transaction_id', 'date', 'time', 'symbol', 'action', 'verified'} | {LEGACY_KEYS.get(f, f) for f in FLOAT_FIELDS}
+
+
+@lru_cache(maxsize=4096)
+def parse_timestamp(date, time):
+    """Convert legacy date/time strings (local time) to epoch nanoseconds; 0 if missing."""
+    # Cached: every row of a transaction carries the same date/time pair
+    try:
+        dt = datetime.strptime(f"{date} {time}", f"{DATE_FORMAT} {TIME_FORMAT}")
+    except (TypeError, ValueError):
+        return 0
+    return int(dt.timestamp()) * 1_000_000_000
+
+
+def decode_tids(rows):
+    """Transaction id column of legacy trade rows, without decoding anything else."""
+    return array('q', [int(row.get('transaction_id', 0) or 0) for row in rows])
+
+
+def select_indices(tids, start_tid=None, end_tid=None):
+    """Row indices with start_tid <= tid <= end_tid."""
+    lo = -1 if start_tid is None else start_tid
+    hi = math.inf if end_tid is None else end_tid
+    return [i for i, tid in enumerate(tids) if lo <= tid <= hi]
+
+
+def group_indices(tids):
+    """OrderedDict of tid -> row indices, in ascending transaction order."""
+    groups = {}
+    for i, tid in enumerate(tids):
+        groups.setdefault(tid, []).append(i)
+    return OrderedDict(sorted(groups.items()))
+
+
+def _float(value):
+    return NAN if value is None else float(value)
+
+
+class Trade:
+    """
+    One trade row with numeric fields: int transaction id, epoch-ns timestamp,
+    interned symbol and floats (NaN where the legacy row had None or no value).
+    """
+    __slots__ = ('tid', 'ts_ns', 'symbol', 'action', 'verified', 'extra') + FLOAT_FIELDS
+
+    def __init__(self, tid, ts_ns, symbol, action='Hold', shares_changed=0.0, shares_held=0.0, price=NAN,
+                 amount=0.0, allocation=0.0, cash=NAN, portfolio_value=NAN, final_cash=NAN, verified=False, extra=None):
+        self.tid = tid
+        self.ts_ns = ts_ns
+        self.symbol = sys.intern(symbol)
+        self.action = sys.intern(action)
+        self.shares_changed = shares_changed
+        self.shares_held = shares_held
+        self.price = price
+        self.amount = amount
+        self.allocation = allocation
+        self.cash = cash
+        self.portfolio_value = portfolio_value
+        self.final_cash = final_cash
+        self.verified = verified
+        # Any keys the record type does not model, kept so the codec round-trips
+        self.extra = extra
+
+    @classmethod
+    def from_dict(cls, row):
+        """Decode a legacy JSON trade row."""
+        extra = {k: v for k, v in row.items() if k not in KNOWN_KEYS} or None
+        return cls(
+            int(row.get('transaction_id', 0) or 0),
+            parse_timestamp(row.get('date'), row.get('time')),
+            row.get('symbol', ''),
+            row.get('action', 'Hold'),
+            verified=bool(row.get('verified', False)),
+            extra=extra,
+            **{f: _float(row.get(LEGACY_KEYS.get(f, f), FLOAT_DEFAULTS.get(f))) for f in FLOAT_FIELDS}
+        )
+
+    @property
+    def transaction_id(self):
+        return f"{self.tid:05d}"
+
+    @property
+    def datetime(self):
+        return datetime.fromtimestamp(self.ts_ns / 1_000_000_000) if self.ts_ns else None
+
+    @property
+    def date(self):
+        return self.datetime.strftime(DATE_FORMAT) if self.ts_ns else ''
+
+    @property
+    def time(self):
+        return self.datetime.strftime(TIME_FORMAT) if self.ts_ns else ''
+
+    def to_dict(self):
+        """Encode back to the legacy JSON trade row."""
+        row = {
+            "transaction_id": self.transaction_id,
+            "time": self.time,
+            "date": self.date,
+            "symbol": self.symbol,
+            "action": self.action,
+        }
+        for field in FLOAT_FIELDS:
+            value = getattr(self, field)
+            if math.isnan(value):
+                if field in OPTIONAL_FIELDS:
+                    continue
+                value = None
+            row[LEGACY_KEYS.get(field, field)] = value
+        if self.verified:
+            row["verified"] = True
+        if self.extra:
+            row.update(self.extra)
+        return row
+
+    def __repr__(self):
+        return f"Trade(tid={self.tid}, symbol={self.symbol!r}, action={self.action!r}, amount={self.amount})"
+